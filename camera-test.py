@@ -5,7 +5,8 @@ from libcamera import controls
 from picamera2 import Picamera2, Preview
 from src.services.yolo_detector_service import YOLODetectorService
 from src.services.tracker import Tracker
-from src.lib.constants import CAMERA_WIDTH, CAMERA_HEIGHT, RAND_COLORS
+from src.lib.constants import CAMERA_WIDTH, CAMERA_HEIGHT, RAND_COLORS, FRAME_ROTATION
+from src.lib.utils import FrameRotation
 
 # Camera Configuration
 picam2 = Picamera2()
@@ -22,6 +23,9 @@ picam2.start()
 # deepSORT
 tracker = Tracker()
 
+# Inference runs on the native frame; only boxes and the preview are rotated
+rotation = FrameRotation(FRAME_ROTATION)
+
 # YOLO
 yolo = YOLODetectorService("../practice_design/yolo11s_ncnn_model", resolution=(CAMERA_WIDTH, CAMERA_HEIGHT), imgsz=640, confidence=0.8, tracker=tracker)
 
@@ -36,18 +40,19 @@ upload_queue: Queue = Queue()
 
 while True:
     frame = picam2.capture_array()
-    frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
     
-    detections, metadata = yolo.detect(frame)
+    detections = yolo.detect(frame)
     
-    frame, annotated = yolo.draw_detections(frame, detections, metadata)
+    annotated = rotation.to_display(yolo.track(frame, detections), frame.shape)
+    tracks = rotation.to_display(tracker.tracks, frame.shape)
+    frame = yolo.render(rotation.image(frame), tracks, annotated)
 
-    regions = yolo.classify_object_region(annotated, CAMERA_WIDTH)
+    regions = yolo.classify_object_region(annotated, CAMERA_HEIGHT)
 
     
     for region, objects in regions.items():
-        region_has_valid = any(obj.cls in valid_classes for obj in objects)
-        region_has_invalid = any(obj.cls in invalid_classes for obj in objects)
+        region_has_valid = objects.contains_any(valid_classes)
+        region_has_invalid = objects.contains_any(invalid_classes)
         
         if region == 'entry':
             for obj in objects:
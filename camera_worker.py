@@ -4,7 +4,6 @@ import threading
 import json
 import logging
 import sys
-import requests
 import cv2
 
 from fastapi import FastAPI
@@ -16,6 +15,8 @@ from uvicorn import Config, Server
 
 from uno_serial import UnoSerialProcessor
 from src.services.system_model import Status, SystemSettings
+from src.services.uploader import FoodWasteUploader
+from src.lib.entities import UploadItem
 
 def ensure_dir(path):
     os.makedirs(path, exist_ok=True)
@@ -66,6 +67,9 @@ class CameraProcessor:
         # Server thread handle
         self._server_thread = None
 
+        # Uploads
+        self.uploader = FoodWasteUploader()
+
     def update_id(self, new_id: int):
         if isinstance(new_id, int) and new_id > 0:
             self.id = new_id
@@ -158,30 +162,9 @@ class CameraProcessor:
 
         for cls, records in entry_info.items():
             for conf, path in records:
-                payload = {
-                    "foodWasteScheduleId": self.id,
-                    "materialStatus": "valid" if cls not in self.invalid_classes else "invalid",
-                    "confidence": conf,
-                    "classname": cls
-                }
-                logging.info("Enqueue upload: %s", payload)
-                threading.Thread(
-                    target=self.send_request,
-                    name="upload_to_server",
-                    args=(path, payload),
-                    daemon=True
-                ).start()
-
-    def send_request(self, filepath: str, payload: dict):
-        try:
-            url = f"{os.getenv('SERVER_URL')}/food-waste"
-            with open(filepath, "rb") as f:
-                files = {"file": (os.path.basename(filepath), f, "image/png")}
-                data = {k: str(v) for k, v in payload.items()}
-                r = requests.post(url, files=files, data=data)
-                logging.info(f"Upload response: {r.status_code} - {r.text}")
-        except Exception as e:
-            logging.error("Upload error: %s", e)
+                item = UploadItem(None, cls, conf, os.path.basename(path), path=path)
+                logging.info("Enqueue upload: %s", item.filename)
+                self.uploader.submit(item, self.id)
 
     def start_server(self):
         if getattr(self, "_server_thread", None) and self._server_thread.is_alive():
@@ -200,6 +183,8 @@ class CameraProcessor:
         if self.running:
             return
         self.running = True
+        # stop() stops the uploader, so each stream start brings it back up.
+        self.uploader.start()
         self.picam2.start()
         logging.info("Camera stream started.")
         self.start_server()
@@ -220,6 +205,7 @@ class CameraProcessor:
 
         self.running = False
         logging.info("Stopping camera stream...")
+        self.uploader.stop()
 
         try:
             if hasattr(self, 'picam2') and self.picam2 is not None:
@@ -1,3 +1,4 @@
+import os
 import json
 import logging
 import threading
@@ -17,7 +18,9 @@ try:
     from src.services.device_info import DeviceInfo
     from src.services.system_model import SystemSettings
     from src.services.camera_service import CameraService
+    from src.services.camera_fleet import CameraFleet
     from src.services.thermal_camera import ThermalCameraProcessor
+    from src.services.session_recorder import SessionRecorder
 except ImportError:
     raise ImportError("Error: Required modules could not be imported.")
 
@@ -30,6 +33,10 @@ class MainProgram:
         # --- Sensors and Devices ---
         load_dotenv()
 
+        # --- Session Recording ---
+        record_path = os.getenv("SESSION_RECORD_PATH")
+        self.recorder = SessionRecorder(record_path) if record_path else None
+
         # --- Broker Init ---
         mqtt_client_manager = BrokerService(
             on_connect=on_connect,
@@ -46,15 +53,33 @@ class MainProgram:
         # --- Processing Modules ---
         self.device_info = DeviceInfo()
         self.thermal_camera = ThermalCameraProcessor()
-        self.camera = CameraService(
-            model_path="models/best_v1_ncnn_model",
-            resolution=(768, 1024),
-            uno_serial=self.uno,
-            settings=self.settings,
-        )
+        if CAMERAS:
+            # Several belts share one detector; session recording and the inference process stay single-camera features.
+            self.camera = CameraFleet(
+                resolution=(768, 1024),
+                uno_serial=self.uno,
+                settings=self.settings,
+                cameras=CAMERAS,
+                mqtt_client=self.client,
+                ir_backend=os.getenv("IR_BACKEND", IR_BACKEND),
+            )
+        else:
+            self.camera = CameraService(
+                resolution=(768, 1024),
+                uno_serial=self.uno,
+                settings=self.settings,
+                recorder=self.recorder,
+                mqtt_client=self.client,
+                inference_process=os.getenv("INFERENCE_PROCESS", str(INFERENCE_PROCESS)).lower() in ("1", "true", "yes"),
+                ir_backend=os.getenv("IR_BACKEND", IR_BACKEND),
+            )
+        self.mega.recorder = self.recorder
+        self.uno.recorder = self.recorder
+        self.thermal_camera.recorder = self.recorder
         
         # --- Broker Message Routing ---
         message_processor = BrokerMessageProcessor(settings=self.settings, thermal_camera=self.thermal_camera, camera_inference=self.camera, mega=self.mega, uno=self.uno)
+        message_processor.recorder = self.recorder
         self.client.on_message = message_processor.on_message
         self.client.enable_logger()
         
@@ -155,7 +180,7 @@ class MainProgram:
     def stop(self):
         logging.info("Stopping program...")
 
-        self.camera.stop_stream()
+        self.camera.shutdown()
         self.thermal_camera.stop_server()
 
         self.device_info_stop.set()
@@ -172,6 +197,9 @@ class MainProgram:
         self._device_info_started = False
 
         self.client.loop_stop()
+
+        if self.recorder:
+            self.recorder.close()
         
         logging.info("Program stopped.")
 
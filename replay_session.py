@@ -0,0 +1,120 @@
+import os
+import json
+import logging
+import argparse
+import threading
+from time import monotonic, sleep
+
+os.environ.setdefault("GPIOZERO_PIN_FACTORY", "mock")
+
+from src.lib.constants import MODEL_PATH, MEGA_SERIAL_PORT
+from src.logging.logger import setup_logger
+from src.broker.broker_message_processor import BrokerMessageProcessor
+from src.serials.mega_serial import MegaSerialProcessor
+from src.serials.uno_serial import UnoSerialProcessor
+from src.services.camera_service import CameraService
+from src.services.frame_pipeline import LatestFrameQueue
+from src.services.frame_source import ReplayFrameSource, ScaledFrameSource
+from src.services.session_recorder import CAMERA, THERMAL, SERIAL, MQTT
+from src.services.session_replay import ReplayClient, ReplayDriver, ReplayMessage, ReplayThermalSensor, ReplayUploader
+from src.services.system_model import SystemSettings
+from src.services.thermal_camera import ThermalCameraProcessor
+
+
+STALL_TIMEOUT = 30.0
+
+
+def wait_for_pipeline(camera: CameraService, pushed: int):
+    # Every pushed frame either reaches post-processing or is counted as a stage error.
+    last, changed = -1, monotonic()
+    while True:
+        done = camera.stages[-1].meter.processed + sum(stage.errors for stage in camera.stages) if camera.stages else 0
+        if done >= pushed:
+            return
+        if done != last:
+            last, changed = done, monotonic()
+        elif monotonic() - changed > STALL_TIMEOUT:
+            logging.warning(f"Replay pipeline stalled at {done}/{pushed} frames")
+            return
+        sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded feeding session through the camera pipeline.")
+    parser.add_argument("path", help="Session file written with SESSION_RECORD_PATH")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier; 0 replays as fast as possible")
+    parser.add_argument("--model", default=MODEL_PATH, help="YOLO export to run on the replayed frames; defaults to the registry's pick")
+    parser.add_argument("--process", action="store_true", help="Run detection and tracking in a separate worker process")
+    args = parser.parse_args()
+
+    setup_logger()
+
+    settings = SystemSettings()
+    client = ReplayClient()
+    mega = MegaSerialProcessor("replay-mega", 0, client)
+    uno = UnoSerialProcessor("replay-uno", 0, client)
+
+    sensor = ReplayThermalSensor()
+    thermal_camera = ThermalCameraProcessor(mlx=sensor)
+
+    frames = ReplayFrameSource()
+    uploader = ReplayUploader()
+    camera = CameraService(
+        model_path=args.model,
+        uno_serial=uno,
+        settings=settings,
+        source=ScaledFrameSource(frames, 640),
+        inference_process=args.process,
+        ir_backend="fake",
+        uploader=uploader,
+        capture_queue=LatestFrameQueue(maxsize=1, lossless=True),
+        result_queue=LatestFrameQueue(maxsize=2, lossless=True),
+    )
+    # Recorded frames were already paced by the production controller.
+    camera.set_frame_rate(None)
+    processor = BrokerMessageProcessor(settings=settings, thermal_camera=thermal_camera, camera_inference=camera, mega=mega, uno=uno)
+
+    def on_serial(record):
+        target = mega if record["port"] == MEGA_SERIAL_PORT else uno
+        target.handle_message(record["line"])
+
+    pushed = [0]
+
+    def on_camera(frame):
+        frames.push(frame)
+        pushed[0] += 1
+
+    def on_mqtt(record):
+        # Status and settings changes apply after the frames recorded before them, as they did live.
+        wait_for_pipeline(camera, pushed[0])
+        processor.on_message(client, None, ReplayMessage(record["topic"], record["payload"].encode("utf-8")))
+
+    driver = ReplayDriver(args.path, speed=args.speed)
+    driver.on(CAMERA, on_camera)
+    driver.on(THERMAL, sensor.push)
+    driver.on(SERIAL, on_serial)
+    driver.on(MQTT, on_mqtt)
+
+    # Load and warm the models up front so every replayed frame goes through detection.
+    if not camera.load_models():
+        raise SystemExit("Could not load the camera models")
+
+    stream = threading.Thread(target=camera.start_stream, name="replay_camera_stream", daemon=True)
+    stream.start()
+
+    summary = driver.run()
+    wait_for_pipeline(camera, pushed[0])
+
+    summary["pipeline"] = camera.pipeline_stats()
+    summary["published"] = dict(client.published)
+    camera.shutdown()
+    stream.join(timeout=5)
+    summary["uploads"] = uploader.stats()
+    uploader.cleanup()
+
+    logging.info("Replay finished")
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,16 @@ import threading
 from src.lib.constants import RELAY_CONFIG
 from src.services.system_model import Status, SystemSettings
 from src.services.camera_service import CameraService
+from src.services.camera_fleet import CameraFleet
 from src.services.thermal_camera import ThermalCameraProcessor
 from src.serials.mega_serial import MegaSerialProcessor
 from src.serials.uno_serial import UnoSerialProcessor
 
 
 class BrokerMessageProcessor:
-    def __init__(self, settings: SystemSettings, thermal_camera: ThermalCameraProcessor, camera_inference: CameraService, mega: MegaSerialProcessor, uno: UnoSerialProcessor,):
+    recorder = None
+
+    def __init__(self, settings: SystemSettings, thermal_camera: ThermalCameraProcessor, camera_inference: "CameraService | CameraFleet", mega: MegaSerialProcessor, uno: UnoSerialProcessor,):
         self.mega = mega
         self.uno = uno
 
@@ -53,6 +56,8 @@ class BrokerMessageProcessor:
                 
     def on_message(self, client, userdata, message):
         payload = message.payload.decode("utf-8")
+        if self.recorder:
+            self.recorder.record_mqtt(message.topic, payload)
         handler = self.topics.get(message.topic)
         if handler:
             handler(payload)
@@ -118,5 +123,9 @@ class BrokerMessageProcessor:
         try:
             self.settings.update(**json.loads(payload))
             self.thermal_camera.set_refresh_rate(self.settings.worm_refresh_rate)
+            self.camera_inference.set_tracker_mode(self.settings.tracker_mode)
+            self.camera_inference.set_belt_roi(self.settings.belt_roi)
+            self.camera_inference.set_frame_rate(self.settings.target_fps, self.settings.latency_budget_ms)
+            self.camera_inference.set_detection_stride(self.settings.detection_stride)
         except ValueError:
             logging.warning(f"Ignored invalid status value: {payload}")
@@ -39,10 +39,122 @@ CONTROL_TOPICS = [
 CAMERA_WIDTH = 768
 CAMERA_HEIGHT = 1024
 RESOLUTION = (768, 1024)
+FRAME_ROTATION = 90
+BELT_ROI = None
 OUTPUT_DIR = "./public/detections"
-MODEL_PATH = '/home/raspi/projects/practice_design/yolo11s_ncnn_model'
+# An explicit export path skips the registry; None lets ModelRegistry pick the fastest export of MODEL_NAME.
+MODEL_PATH = None
+MODEL_DIR = "models"
+MODEL_NAME = "best_v1"
+MODEL_BENCHMARK_CACHE = "./public/model_benchmark.json"
+MODEL_BENCHMARK_IMAGES = "models/benchmark"
+MODEL_BENCHMARK_RUNS = 20
+MODEL_TOPIC = "camera/model"
+CROP_ENCODER_WORKERS = 2
+CROP_JPEG_QUALITY = 90
+MAX_PENDING_CROPS = 64
+ARCHIVE_CROPS = False
 
 RAND_COLORS = [(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255)) for j in range(10)]
 
+REGION_NAMES = ("exit", "middle", "entry")
+
 VALID_CLASSES = ["fruit", "vegetable", "grains"]
-INVALID_CLASSES = ["citrus", "meat", "foreign"]
\ No newline at end of file
+INVALID_CLASSES = ["citrus", "meat", "foreign"]
+
+# PIPELINE CONFIG
+STAGE_ERROR_BACKOFF = 0.05
+STAGE_ERROR_BACKOFF_MAX = 2.0
+# Consecutive capture errors before the stream stops, as a disconnected camera did before the pipeline split.
+CAPTURE_MAX_FAILURES = 20
+
+# FRAME RATE CONFIG
+TARGET_FPS = 15
+LATENCY_BUDGET_MS = None
+MIN_FPS = 2
+THROTTLE_TEMP = 80
+THROTTLE_RELEASE_TEMP = 72
+THROTTLE_FPS = 5
+FRAME_RATE_MONITOR_INTERVAL = 5
+FRAME_RATE_TOPIC = "camera/fps"
+
+# DETECTION STRIDE CONFIG
+DETECTION_STRIDE = 3
+STRIDE_UNCERTAINTY_LIMIT = 25.0
+STRIDE_BOUNDARY_MARGIN = 0.05
+
+# TRACK STORE CONFIG
+TRACK_STORE_MAX = 256
+TRACK_STATE_TTL = 10.0
+TRACK_SHARPNESS_WIDTH = 96
+TRACK_SHARPNESS_REF = 100.0
+
+# EJECTION CONFIG
+PREDICTIVE_EJECTION = True
+DIVERTER_X = 0.0
+EJECT_LEAD_TIME = 0.12
+EJECT_HOLD_TIME = 0.4
+EJECT_SPIN_TIME = 0.002
+MIN_BELT_SPEED = 20
+MAX_EJECT_HORIZON = 5.0
+EJECT_OPEN_COMMAND = "<Conveyor:Eject:0>"
+EJECT_CLOSE_COMMAND = "<Conveyor:Eject:90>"
+
+# IR SENSOR CONFIG
+# "gpio" uses gpiozero; "fake" runs without a Pi and is driven through FakeInputDevice.trigger().
+IR_BACKEND = "gpio"
+IR_EVENT_BUFFER = 256
+IR_BOUNCE_TIME = None
+# Largest gap, as a fraction of display width, between a track's position at an IR edge and the beam.
+IR_MATCH_TOLERANCE = 0.05
+
+# METRICS CONFIG
+METRICS_ENABLED = True
+METRICS_PREFIX = "vermi_camera"
+METRICS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+METRICS_TOPIC = "camera/metrics"
+
+# MOTION GATE CONFIG
+MOTION_DOWNSCALE_WIDTH = 64
+MOTION_PIXEL_THRESHOLD = 25
+MOTION_MIN_AREA = 0.002
+MOTION_HOLD_FRAMES = 15
+MOTION_ROI = (0.0, 0.0, 1.0, 1.0)
+
+# TRACKER CONFIG
+ENCODER_MODEL_PATH = '/home/raspi/projects/system_rebase/models/mars-small128.pb'
+TRACKER_MODES = ("appearance", "motion")
+ASSOCIATION_MIN_IOU = 0.3
+
+# INFERENCE WORKER CONFIG
+INFERENCE_PROCESS = False
+INFERENCE_RING_SLOTS = 3
+INFERENCE_READY_TIMEOUT = 180
+INFERENCE_RESULT_TIMEOUT = 2.0
+
+# MULTI CAMERA CONFIG
+# One dict per belt: camera_id, ir_pin (None for no sensor) plus per-belt CameraService fields (camera_num, belt_roi, rotation, diverter_x, stream_port).
+# Empty keeps the single-camera service. Model, imgsz and confidence are shared by every belt.
+CAMERAS = []
+# Exports are usually fixed at batch 1; raise only for a model exported with a matching batch size.
+INFERENCE_BATCH_SIZE = 1
+INFERENCE_BATCH_WAIT = 0.005
+SCHEDULER_TOPIC = "camera/scheduler"
+
+# UPLOADER CONFIG
+UPLOAD_ENDPOINT = "/food-waste"
+UPLOAD_WORKERS = 2
+UPLOAD_BATCH_SIZE = 8
+UPLOAD_SPOOL_PATH = "./public/upload_spool.db"
+UPLOAD_SPOOL_MAX_ITEMS = 5000
+UPLOAD_TIMEOUT = (3.05, 10)
+UPLOAD_MAX_RETRIES = 4
+UPLOAD_BACKOFF_BASE = 0.5
+UPLOAD_BACKOFF_MAX = 30
+
+# SESSION RECORDING CONFIG
+RECORD_JPEG_QUALITY = 90
+RECORD_CHUNK_RECORDS = 64
+RECORD_CHUNK_BYTES = 1 << 20
+# Raw frames waiting for the JPEG writer are capped by size; a full-resolution frame is about 2.4 MB.
+RECORD_CAMERA_QUEUE_BYTES = 32 << 20
@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+import numpy as np
+from dataclasses import dataclass, field
+from src.lib.constants import REGION_NAMES
 
 
 @dataclass
@@ -6,16 +8,168 @@ class UploadItem:
     track_id: int
     cls: str
     conf: float
-    path: str
-    
+    filename: str
+    data: bytes = None
+    path: str = None
+    camera_id: str = None
+
+
+class DetectionView:
+    __slots__ = ("batch", "index")
+
+    def __init__(self, batch: "DetectionBatch", index: int):
+        self.batch = batch
+        self.index = index
+
+    @property
+    def bbox(self) -> tuple[int, int, int, int]:
+        x1, y1, x2, y2 = self.batch.boxes[self.index]
+        return int(x1), int(y1), int(x2), int(y2)
+
+    @property
+    def conf(self) -> float:
+        return float(self.batch.confidences[self.index])
+
+    @property
+    def class_id(self) -> int:
+        return int(self.batch.class_ids[self.index])
+
+    @property
+    def cls(self) -> str:
+        return self.batch.names.get(self.class_id, "unknown")
+
+    @property
+    def track_id(self) -> int:
+        track_id = int(self.batch.track_ids[self.index])
+        return track_id if track_id >= 0 else None
+
+    @property
+    def velocity(self) -> tuple[float, float]:
+        vx, vy = self.batch.velocities[self.index]
+        return float(vx), float(vy)
+
+    @property
+    def region(self) -> str:
+        code = int(self.batch.regions[self.index])
+        return REGION_NAMES[code] if code >= 0 else None
+
+    def __repr__(self):
+        return f"DetectionView(track_id={self.track_id}, bbox={self.bbox}, conf={self.conf:.2f}, cls={self.cls!r})"
+
+
+class DetectionBatch:
+    __slots__ = ("boxes", "confidences", "class_ids", "track_ids", "regions", "velocities", "names")
+
+    def __init__(self, boxes=None, confidences=None, class_ids=None, track_ids=None, regions=None, velocities=None, names=None):
+        self.boxes = np.zeros((0, 4), dtype=np.float32) if boxes is None else np.ascontiguousarray(boxes, dtype=np.float32).reshape(-1, 4)
+        count = len(self.boxes)
+
+        self.confidences = self._column(confidences, count, np.float32, 0)
+        self.class_ids = self._column(class_ids, count, np.int32, -1)
+        self.track_ids = self._column(track_ids, count, np.int64, -1)
+        self.regions = self._column(regions, count, np.int8, -1)
+        # Box-center velocity in pixels per second, from the tracker's Kalman state.
+        self.velocities = np.zeros((count, 2), dtype=np.float32) if velocities is None else np.ascontiguousarray(velocities, dtype=np.float32).reshape(count, 2)
+        self.names = names or {}
+
+    @staticmethod
+    def _column(values, count, dtype, fill):
+        if values is None:
+            return np.full(count, fill, dtype=dtype)
+        return np.ascontiguousarray(values, dtype=dtype).reshape(count)
+
+    @classmethod
+    def from_xyxy_conf_cls(cls, data, names=None):
+        data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+        return cls(data[:, :4], data[:, 4], data[:, 5], names=names)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __bool__(self):
+        return len(self.boxes) > 0
+
+    def __getitem__(self, index) -> DetectionView:
+        return DetectionView(self, index)
+
+    def __iter__(self):
+        return (DetectionView(self, i) for i in range(len(self.boxes)))
+
+    def select(self, mask) -> "DetectionBatch":
+        return DetectionBatch(
+            self.boxes[mask],
+            self.confidences[mask],
+            self.class_ids[mask],
+            self.track_ids[mask],
+            self.regions[mask],
+            self.velocities[mask],
+            self.names,
+        )
+
+    def tlwh(self):
+        tlwh = self.boxes.copy()
+        tlwh[:, 2:] -= tlwh[:, :2]
+        return tlwh
+
+    def contains_any(self, classnames) -> bool:
+        class_ids = [class_id for class_id, name in self.names.items() if name in classnames]
+        return bool(np.isin(self.class_ids, class_ids).any())
+
+    def scaled(self, sx: float, sy: float, dx: float = 0.0, dy: float = 0.0) -> "DetectionBatch":
+        batch = self.select(slice(None))
+        batch.boxes = self.boxes * np.array((sx, sy, sx, sy), dtype=np.float32) + np.array((dx, dy, dx, dy), dtype=np.float32)
+        batch.velocities = self.velocities * np.array((sx, sy), dtype=np.float32)
+        return batch
+
+    def centers_x(self):
+        return (self.boxes[:, 0] + self.boxes[:, 2]) / 2
+
+    def to_record(self):
+        # One (N, 9) float32 array of x1, y1, x2, y2, conf, class_id, track_id, vx, vy; names travel separately.
+        return np.column_stack((self.boxes, self.confidences, self.class_ids, self.track_ids, self.velocities)).astype(np.float32)
+
+    @classmethod
+    def from_record(cls, record, names=None):
+        record = np.asarray(record, dtype=np.float32).reshape(-1, 9)
+        return cls(record[:, :4], record[:, 4], record[:, 5], record[:, 6], velocities=record[:, 7:], names=names)
+
 @dataclass
-class Track:
-    track_id: int = None
-    bbox: tuple[int, int, int, int] = None
-        
+class SourceFrame:
+    full: any
+    inference: any
+    scale: tuple[float, float] = (1.0, 1.0)
+    offset: tuple[float, float] = (0.0, 0.0)
+
+    def to_full(self, detections: DetectionBatch) -> DetectionBatch:
+        (sx, sy), (dx, dy) = self.scale, self.offset
+        if (sx, sy, dx, dy) == (1.0, 1.0, 0.0, 0.0):
+            return detections
+        return detections.scaled(sx, sy, dx, dy)
+
+    def to_inference(self, detections: DetectionBatch) -> DetectionBatch:
+        (sx, sy), (dx, dy) = self.scale, self.offset
+        if (sx, sy, dx, dy) == (1.0, 1.0, 0.0, 0.0):
+            return detections
+        return detections.scaled(1 / sx, 1 / sy, -dx / sx, -dy / sy)
+
+
 @dataclass
-class Metadata:
-    track_id: int
-    bbox: tuple[int, int, int, int]
-    conf: float
-    cls: str
\ No newline at end of file
+class TrackingResult:
+    detections: DetectionBatch
+    annotations: DetectionBatch
+    tracks: DetectionBatch
+    ended: list = field(default_factory=list)
+    uncertainty: float = 0.0
+    predicted: bool = False
+
+
+@dataclass
+class FramePacket:
+    frame_id: int
+    timestamp: float
+    frame: any
+    source: SourceFrame = None
+    tracks: DetectionBatch = field(default_factory=DetectionBatch)
+    annotations: DetectionBatch = field(default_factory=DetectionBatch)
+    ended_tracks: list = field(default_factory=list)
+    predicted: bool = False
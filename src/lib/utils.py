@@ -1,8 +1,13 @@
 import os
 import logging
 import unicodedata
+import cv2
+import numpy as np
+from contextlib import contextmanager
 from datetime import datetime
-from src.lib.constants import INVALID_CLASSES
+from time import perf_counter
+from src.lib.constants import INVALID_CLASSES, RAND_COLORS, REGION_NAMES
+from src.lib.entities import DetectionBatch
 from colorama import Fore, Style, init
 
 def clean_unicode(text):
@@ -107,9 +112,207 @@ def expand_crop_box(x1, y1, x2, y2, frame_width, frame_height, margin=0.2):
 
     return new_x1, new_y1, new_x2, new_y2
 
+def iou_matrix(boxes_a, boxes_b):
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+def match_one_to_one(overlaps, min_iou):
+    # Greedy assignment by descending IoU: each detection labels at most one track. Returns -1 for unmatched rows.
+    rows, cols = np.nonzero(overlaps >= min_iou)
+    order = np.argsort(-overlaps[rows, cols], kind="stable")
+
+    matches = np.full(overlaps.shape[0], -1, dtype=np.int64)
+    taken = np.zeros(overlaps.shape[1], dtype=bool)
+    for row, col in zip(rows[order], cols[order]):
+        if matches[row] < 0 and not taken[col]:
+            matches[row] = col
+            taken[col] = True
+    return matches
+
+@contextmanager
+def timed(report: dict, phase: str):
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        report[phase] = round((perf_counter() - start) * 1000, 1)
+
+class FrameRotation:
+    CV2_CODES = {
+        90: cv2.ROTATE_90_CLOCKWISE,
+        180: cv2.ROTATE_180,
+        270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+    }
+
+    def __init__(self, degrees: int = 0):
+        if degrees % 360 not in (0, 90, 180, 270):
+            raise ValueError(f"Unsupported frame rotation: {degrees}")
+        self.degrees = degrees % 360
+
+    def display_shape(self, native_shape):
+        h, w = native_shape[:2]
+        return (w, h) if self.degrees in (90, 270) else (h, w)
+
+    def image(self, image):
+        if not self.degrees:
+            return image.copy()
+        return cv2.rotate(image, self.CV2_CODES[self.degrees])
+
+    def boxes_to_display(self, boxes, native_shape):
+        h, w = native_shape[:2]
+        x1, y1, x2, y2 = np.asarray(boxes, dtype=np.float32).reshape(-1, 4).T
+
+        # Clockwise rotations of xyxy boxes; rotation preserves sizes so no rescaling is needed.
+        if self.degrees == 90:
+            return np.stack((h - y2, x1, h - y1, x2), axis=1)
+        if self.degrees == 180:
+            return np.stack((w - x2, h - y2, w - x1, h - y1), axis=1)
+        if self.degrees == 270:
+            return np.stack((y1, w - x2, y2, w - x1), axis=1)
+        return np.stack((x1, y1, x2, y2), axis=1)
+
+    def boxes_to_native(self, boxes, native_shape):
+        h, w = native_shape[:2]
+        x1, y1, x2, y2 = np.asarray(boxes, dtype=np.float32).reshape(-1, 4).T
+
+        if self.degrees == 90:
+            return np.stack((y1, h - x2, y2, h - x1), axis=1)
+        if self.degrees == 180:
+            return np.stack((w - x2, h - y2, w - x1, h - y1), axis=1)
+        if self.degrees == 270:
+            return np.stack((w - y2, x1, w - y1, x2), axis=1)
+        return np.stack((x1, y1, x2, y2), axis=1)
+
+    def vectors_to_display(self, vectors):
+        vx, vy = np.asarray(vectors, dtype=np.float32).reshape(-1, 2).T
+
+        if self.degrees == 90:
+            return np.stack((-vy, vx), axis=1)
+        if self.degrees == 180:
+            return np.stack((-vx, -vy), axis=1)
+        if self.degrees == 270:
+            return np.stack((vy, -vx), axis=1)
+        return np.stack((vx, vy), axis=1)
+
+    def to_display(self, detections: DetectionBatch, native_shape) -> DetectionBatch:
+        if not self.degrees:
+            return detections
+
+        batch = detections.select(slice(None))
+        batch.boxes = self.boxes_to_display(detections.boxes, native_shape)
+        batch.velocities = self.vectors_to_display(detections.velocities)
+        return batch
+
+class FrameROI:
+    def __init__(self, points=None):
+        # Normalized to the camera's native frame: [x1, y1, x2, y2] or [[x, y], ...] (3+ points); None is the whole frame.
+        self.points = self.parse(points)
+        self.is_polygon = self.points is not None and len(self.points) > 2
+        self._mask_key = None
+        self._mask = None
+
+    @staticmethod
+    def parse(points):
+        if points is None:
+            return None
+
+        values = np.asarray(points, dtype=np.float32)
+        if values.shape == (4,):
+            x1, y1, x2, y2 = values
+            values = np.array(((x1, y1), (x2, y2)), dtype=np.float32)
+
+        if values.ndim != 2 or values.shape[1] != 2 or len(values) < 2:
+            raise ValueError(f"Invalid ROI: {points}")
+        if not ((values >= 0) & (values <= 1)).all():
+            raise ValueError(f"ROI must be normalized to 0..1: {points}")
+
+        lo, hi = values.min(axis=0), values.max(axis=0)
+        if (hi - lo).min() <= 0:
+            raise ValueError(f"ROI has no area: {points}")
+
+        return values
+
+    def bounds(self, shape) -> tuple[int, int, int, int]:
+        h, w = shape[:2]
+        if self.points is None:
+            return 0, 0, w, h
+
+        (x1, y1), (x2, y2) = self.points.min(axis=0), self.points.max(axis=0)
+        return int(x1 * w), int(y1 * h), max(int(x1 * w) + 1, round(x2 * w)), max(int(y1 * h) + 1, round(y2 * h))
+
+    def mask(self, image, native_shape, offset, scale):
+        if not self.is_polygon:
+            return image
+
+        key = (native_shape[:2], image.shape[:2], offset, scale)
+        if key != self._mask_key:
+            h, w = native_shape[:2]
+            polygon = (self.points * (w, h) - offset) / scale
+            self._mask = np.zeros(image.shape[:2], dtype=np.uint8)
+            cv2.fillPoly(self._mask, [np.round(polygon).astype(np.int32)], 255)
+            self._mask_key = key
+
+        return cv2.bitwise_and(image, image, mask=self._mask)
+
+def render_tracks(frame, tracks: DetectionBatch, annotations: DetectionBatch):
+    labels = {obj.track_id: f'{obj.cls}: {obj.conf:.2f}%' for obj in annotations}
+
+    for track in tracks:
+        x1, y1, x2, y2 = map(int, track.bbox)
+        track_id = track.track_id
+        color = RAND_COLORS[track_id % len(RAND_COLORS)]
+        label = labels.get(track_id, 'unknown')
+
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
+        (text_w, text_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+        cv2.rectangle(frame, (x1, y1 - text_h - 4), (x1 + text_w, y1), color, -1)
+        cv2.putText(frame, label, (x1, y1 - 2), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+    return frame
+
+def classify_object_region(detections: DetectionBatch, frame_width):
+    region_width = frame_width // 3
+
+    # 0 = exit, 1 = middle, 2 = entry, matching REGION_NAMES.
+    detections.regions = np.digitize(detections.centers_x(), (region_width, region_width * 2)).astype(np.int8)
+
+    return {
+        name: detections.select(detections.regions == code)
+        for code, name in enumerate(REGION_NAMES)
+    }
+
+def exit_clear(regions):
+    return len(regions["exit"]) == 0
+
+def match_beam_events(event_times, detections: DetectionBatch, beam_x: float, frame_time: float, tolerance: float):
+    # Moves every track along its velocity to each edge time and pairs the edge with the track nearest the beam.
+    if not len(event_times) or not detections:
+        return []
+
+    # Monotonic times are large; subtract in float64 so sub-ms offsets survive the cast.
+    dt = (np.asarray(event_times, dtype=np.float64) - frame_time).astype(np.float32)[:, None]
+    positions = detections.centers_x()[None, :] + detections.velocities[None, :, 0] * dt
+    distance = np.abs(positions - beam_x)
+
+    nearest = distance.argmin(axis=1)
+    matched = distance[np.arange(len(nearest)), nearest] <= tolerance
+    return [(t, int(i)) for t, i, ok in zip(event_times, nearest, matched) if ok]
+
 def create_payload(id: int, cls: str, conf: float):
     return {
-        "foodWasteScheduleId": 3,
+        "foodWasteScheduleId": id,
         "materialStatus": "valid" if cls not in INVALID_CLASSES else "invalid",
         "confidence": conf,
         "classname": cls
@@ -6,6 +6,8 @@ from time import sleep, time
 from concurrent.futures import ThreadPoolExecutor
 
 class BaseSerialProcessor:
+    recorder = None
+
     def __init__(self, port="/dev/ttyUSB0", baud=9600, mqtt_publisher=None):
         self.port = port
         self.baud = baud
@@ -46,6 +48,8 @@ class BaseSerialProcessor:
                 text = raw.decode("utf-8", errors="ignore")
                 if "<" in text and ">" in text:
                     msg = text.split("<", 1)[1].split(">", 1)[0].strip()
+                    if self.recorder:
+                        self.recorder.record_serial(self.port, msg)
                     self.message_queue.put(msg, timeout=0.1)
             except Exception as e:
                 logging.error(f"Decode error: {e}")
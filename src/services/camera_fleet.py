@@ -0,0 +1,196 @@
+import json
+import logging
+from threading import Event, Thread
+
+from src.lib.constants import CAMERAS, FRAME_RATE_MONITOR_INTERVAL, METRICS_TOPIC, SCHEDULER_TOPIC
+from src.lib.utils import FrameRotation
+from src.serials.uno_serial import UnoSerialProcessor
+from src.services.camera_service import CameraService
+from src.services.ejection_scheduler import EjectionScheduler
+from src.services.inference_scheduler import InferenceScheduler
+from src.services.metrics import metrics
+from src.services.system_model import SystemSettings
+from src.services.uploader import FoodWasteUploader
+
+
+class CameraFleet:
+    def __init__(
+        self,
+        uno_serial: UnoSerialProcessor,
+        settings: SystemSettings,
+        cameras: list[dict] = CAMERAS,
+        mqtt_client=None,
+        scheduler: InferenceScheduler = None,
+        **shared,
+    ):
+        if not cameras:
+            raise ValueError("CameraFleet needs at least one camera config")
+
+        self.settings = settings
+        self.mqtt_client = mqtt_client
+        self.scheduler = scheduler or InferenceScheduler()
+        # One spool and one set of upload workers for every belt.
+        self.uploader = FoodWasteUploader()
+        # The belts share one diverter on the Uno, so their windows are merged into a single open/close stream.
+        self.uno_serial = uno_serial
+        self.ejector = EjectionScheduler(self._send_serial)
+
+        self.cameras = {}
+        pins = set()
+        for index, config in enumerate(cameras):
+            config = dict(config)
+            camera_id = str(config.pop("camera_id"))
+
+            # Each belt names its IR pin (None for no sensor); the CameraService default would open pin 17 twice.
+            if "ir_pin" not in config:
+                raise ValueError(f"Camera {camera_id} needs an ir_pin entry (None for no IR sensor)")
+            if config["ir_pin"] is not None:
+                if config["ir_pin"] in pins:
+                    raise ValueError(f"Camera {camera_id} reuses IR pin {config['ir_pin']}")
+                pins.add(config["ir_pin"])
+            # Same for the MJPEG server: unconfigured belts get consecutive ports.
+            config.setdefault("stream_port", CameraService.stream_port + index)
+
+            if "rotation" in config:
+                config["rotation"] = FrameRotation(config["rotation"])
+
+            self.cameras[camera_id] = CameraService(
+                uno_serial=uno_serial,
+                settings=settings,
+                camera_id=camera_id,
+                mqtt_client=mqtt_client,
+                inference_scheduler=self.scheduler,
+                uploader=self.uploader,
+                owns_uploader=False,
+                ejector=self.ejector,
+                owns_ejector=False,
+                **{**shared, **config},
+            )
+
+        self.lead = next(iter(self.cameras.values()))
+        self.is_running = False
+        self.stop_event = Event()
+        self.threads = []
+        self.model_loader = None
+        self.monitor_thread = None
+
+    def load_models(self) -> bool:
+        if self.scheduler.ready.is_set():
+            return True
+
+        # Model choice and warm-up happen once; every belt then attaches its own tracker.
+        lead = self.lead
+        if not lead._select_model():
+            return False
+
+        for camera in self.cameras.values():
+            camera.selected_model, camera.model_report = lead.selected_model, lead.model_report
+
+        try:
+            self.scheduler.load(lead.selected_model, lead.imgsz, lead.conf, lead._inference_shape())
+        except Exception as e:
+            logging.error(f"Failed to load the shared detector: {e}")
+            return False
+        return True
+
+    def _load_models_async(self):
+        if self.scheduler.ready.is_set() or (self.model_loader and self.model_loader.is_alive()):
+            return
+
+        self.model_loader = Thread(target=self.load_models, name="fleet_model_loader", daemon=True)
+        self.model_loader.start()
+
+    def _send_serial(self, command: str):
+        with metrics.time("serial_write"):
+            self.uno_serial.send_data(command)
+        metrics.inc("serial_commands")
+
+    def update_id(self, new_id: int):
+        for camera in self.cameras.values():
+            camera.update_id(new_id)
+
+    def set_tracker_mode(self, mode: str):
+        for camera in self.cameras.values():
+            camera.set_tracker_mode(mode)
+
+    def set_belt_roi(self, roi):
+        for camera in self.cameras.values():
+            camera.set_belt_roi(roi)
+
+    def set_frame_rate(self, target_fps: float, latency_budget_ms: float = None):
+        for camera in self.cameras.values():
+            camera.set_frame_rate(target_fps, latency_budget_ms)
+
+    def set_detection_stride(self, stride: int):
+        for camera in self.cameras.values():
+            camera.set_detection_stride(stride)
+
+    def _monitor(self):
+        while not self.stop_event.wait(FRAME_RATE_MONITOR_INTERVAL):
+            try:
+                if self.mqtt_client:
+                    self.mqtt_client.publish(SCHEDULER_TOPIC, json.dumps(self.scheduler.stats()))
+                    if metrics.enabled:
+                        self.mqtt_client.publish(METRICS_TOPIC, json.dumps(metrics.summary()))
+            except Exception as e:
+                logging.error(f"Camera fleet monitor error: {e}")
+
+    def start_stream(self):
+        if self.is_running:
+            return
+
+        self.is_running = True
+        self.stop_event.clear()
+
+        self.uploader.start()
+        self.scheduler.start()
+        if any(camera.predictive_ejection for camera in self.cameras.values()):
+            self.ejector.start()
+        self._load_models_async()
+
+        self.threads = [
+            Thread(target=camera.start_stream, name=f"camera_{camera_id}", daemon=True)
+            for camera_id, camera in self.cameras.items()
+        ]
+        self.monitor_thread = Thread(target=self._monitor, name="camera_fleet_monitor", daemon=True)
+        logging.info(f"Starting {len(self.cameras)} camera streams: {list(self.cameras)}")
+
+        try:
+            for thread in self.threads:
+                thread.start()
+            self.monitor_thread.start()
+
+            self.stop_event.wait()
+        except Exception as e:
+            logging.error("Camera fleet error: %s", e)
+        finally:
+            self.stop_stream()
+            self.uploader.stop()
+
+    def pipeline_stats(self) -> dict:
+        stats = {camera_id: camera.pipeline_stats() for camera_id, camera in self.cameras.items()}
+        stats["inference_scheduler"] = self.scheduler.stats()
+        stats["ejection"] = self.ejector.stats()
+        return stats
+
+    def stop_stream(self):
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        # Stopping the scheduler first releases any belt blocked on a detection.
+        self.scheduler.stop()
+        for camera in self.cameras.values():
+            camera.stop_stream()
+        for thread in self.threads:
+            thread.join(timeout=5)
+        self.ejector.stop()
+
+        self.stop_event.set()
+        if self.monitor_thread and self.monitor_thread.is_alive():
+            self.monitor_thread.join(timeout=2)
+
+    def shutdown(self):
+        self.stop_stream()
+        for camera in self.cameras.values():
+            camera.shutdown()
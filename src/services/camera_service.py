@@ -1,23 +1,46 @@
-from queue import Queue, Empty
+import json
 import logging
 import os
-from threading import Thread
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Event, Thread
 import cv2
-from gpiozero import InputDevice
-from time import sleep
-from libcamera import controls
-from picamera2 import Picamera2
+from time import monotonic
+from typing import TYPE_CHECKING
 from dataclasses import dataclass, field
 
-from src.lib.constants import MODEL_PATH, RESOLUTION, OUTPUT_DIR, INVALID_CLASSES, VALID_CLASSES
-from src.lib.entities import UploadItem
-from src.lib.utils import ensure_dir, expand_crop_box, generate_filename, create_payload
+from src.lib.constants import (
+    MODEL_PATH, RESOLUTION, FRAME_ROTATION, OUTPUT_DIR, INVALID_CLASSES, VALID_CLASSES, ENCODER_MODEL_PATH,
+    CROP_ENCODER_WORKERS, CROP_JPEG_QUALITY, MAX_PENDING_CROPS, ARCHIVE_CROPS, INFERENCE_PROCESS,
+    FRAME_RATE_MONITOR_INTERVAL, FRAME_RATE_TOPIC, METRICS_TOPIC, INFERENCE_READY_TIMEOUT, CAPTURE_MAX_FAILURES,
+    PREDICTIVE_EJECTION, DIVERTER_X, MIN_BELT_SPEED, MAX_EJECT_HORIZON, MODEL_TOPIC, IR_BACKEND, IR_MATCH_TOLERANCE,
+)
+from src.lib.entities import DetectionBatch, FramePacket, TrackingResult, UploadItem
+from src.lib.utils import (
+    FrameRotation, FrameROI, ensure_dir, to_number, expand_crop_box, generate_filename, timed, render_tracks, classify_object_region, exit_clear,
+    match_beam_events,
+)
 from src.serials.uno_serial import UnoSerialProcessor
 from src.services.system_model import SystemSettings, Status
+from src.services.detection_stride import DetectionStride
+from src.services.device_info import DeviceInfo
+from src.services.ejection_scheduler import EjectionScheduler
 from src.services.fast_api_service import FastAPIApp
-from src.services.yolo_detector_service import Metadata, YOLODetectorService
-from src.services.tracker import Tracker
+from src.services.frame_rate_controller import FrameRateController
+from src.services.metrics import metrics
+from src.services.frame_pipeline import LatestFrameQueue, PipelineStage
+from src.services.frame_source import FrameSource, Picamera2Source, ScaledFrameSource
+from src.services.inference_scheduler import InferenceScheduler
+from src.services.inference_worker import InferenceWorker
+from src.services.ir_sensor import IRSensor
+from src.services.model_registry import ModelRegistry
+from src.services.motion_gate import MotionGate
+from src.services.session_recorder import SessionRecorder
+from src.services.track_store import TrackState, TrackStore
+from src.services.uploader import FoodWasteUploader
+
+if TYPE_CHECKING:
+    from src.services.yolo_detector_service import YOLODetectorService
+    from src.services.tracker import Tracker
 
       
 @dataclass
@@ -26,55 +49,224 @@ class CameraService:
     settings: SystemSettings = field(repr=False)
 
     system_id: int = 1
+    camera_id: str = None
+    camera_num: int = 0
     model_path: str = MODEL_PATH
+    encoder_model_path: str = ENCODER_MODEL_PATH
     resolution: tuple[int, int] = RESOLUTION
+    rotation: FrameRotation = field(default_factory=lambda: FrameRotation(FRAME_ROTATION))
     conf: float = 0.8
     imgsz: int = 640
     output_dir: str = OUTPUT_DIR
     invalid_classes: list[str] = field(default_factory=lambda: INVALID_CLASSES)
     valid_classes: list[str] = field(default_factory=lambda: VALID_CLASSES)
+    # Per-belt region config; None falls back to settings.belt_roi.
+    belt_roi: list = None
+    diverter_x: float = DIVERTER_X
+    ir_pin: int = 17
+    ir_backend: str = IR_BACKEND
+    stream_port: int = 8080
     
-    picam: Picamera2 = field(init=False)
-    traker: Tracker = field(init=False)
-    model: YOLODetectorService = field(init=False)
+    source: FrameSource = field(default=None, repr=False)
+    recorder: SessionRecorder = field(default=None, repr=False)
+    mqtt_client: any = field(default=None, repr=False)
+    device_info: DeviceInfo = field(default_factory=DeviceInfo, repr=False)
+    tracker: "Tracker" = field(init=False, default=None)
+    yolo: "YOLODetectorService" = field(init=False, default=None)
+    inference_process: bool = INFERENCE_PROCESS
+    inference_scheduler: InferenceScheduler = field(default=None, repr=False)
+    worker: InferenceWorker = field(init=False, default=None, repr=False)
+    last_tracks: DetectionBatch = field(init=False, default_factory=DetectionBatch)
     app: FastAPIApp = field(init=False)
     frame: any = field(init=False)
-    ir_sensor: InputDevice = field(init=False)
+    ir_sensor: IRSensor = field(init=False, default=None)
+    last_beam_check: float = field(init=False, default=0.0)
+    beam_matches: int = field(init=False, default=0)
+    beam_unmatched: int = field(init=False, default=0)
     
     is_running: bool = False
     diverter_locked: bool = False
+    predictive_ejection: bool = PREDICTIVE_EJECTION
+    # A fleet passes one scheduler for the shared diverter and starts and stops it itself.
+    ejector: EjectionScheduler = field(default=None, repr=False)
+    owns_ejector: bool = True
     
-    uploaded_ids: set = field(default_factory=list)
-    entry_info: dict = field(default_factory=dict)
-    upload_queue: Queue = field(default_factory=Queue)
-    upload_thread: Thread = field(init=False)
-    is_uploading: bool = field(default=False)
+    track_store: TrackStore = field(default_factory=TrackStore)
+    uploader: FoodWasteUploader = field(default_factory=FoodWasteUploader)
+    owns_uploader: bool = True
+
+    frame_count: int = 0
+    capture_queue: LatestFrameQueue = field(default_factory=lambda: LatestFrameQueue(maxsize=1))
+    result_queue: LatestFrameQueue = field(default_factory=lambda: LatestFrameQueue(maxsize=2))
+    archive_crops: bool = ARCHIVE_CROPS
+    crop_encoder: ThreadPoolExecutor = field(
+        default_factory=lambda: ThreadPoolExecutor(max_workers=CROP_ENCODER_WORKERS, thread_name_prefix="crop_encoder")
+    )
+    pending_crops: BoundedSemaphore = field(default_factory=lambda: BoundedSemaphore(MAX_PENDING_CROPS))
+    stages: list[PipelineStage] = field(default_factory=list)
+    stop_event: Event = field(default_factory=Event)
+    motion_gate: MotionGate = field(default_factory=MotionGate)
+    stride: DetectionStride = field(init=False)
+    frame_rate: FrameRateController = field(init=False)
+    monitor_thread: Thread = field(init=False, default=None)
+
+    model_registry: ModelRegistry = field(default_factory=ModelRegistry, repr=False)
+    selected_model: str = field(init=False, default=None)
+    model_report: dict = field(default_factory=dict)
+    models_ready: Event = field(default_factory=Event)
+    model_loader: Thread = field(init=False, default=None)
+    startup_report: dict = field(default_factory=dict)
+    stream_started_at: float = field(init=False, default=0.0)
     
     def __post_init__(self):
+        # Camera, GPIO and models are opened on the first start_stream, not when MainProgram boots.
         ensure_dir(self.output_dir)
-        self.uploaded_ids = set()
-        
-        self.picam = Picamera2()
-        self._configure_camera()
+        self.frame_rate = FrameRateController(self.settings.target_fps, self.settings.latency_budget_ms)
+        if self.ejector is None:
+            self.ejector = EjectionScheduler(self._send_serial)
+        self.stride = DetectionStride(self.settings.detection_stride, diverter_x=self.diverter_x)
+        if self.inference_scheduler is not None:
+            self.inference_scheduler.register(self.camera_id)
 
-        self.tracker = Tracker()
+    def load_models(self) -> bool:
+        if self.models_ready.is_set():
+            return True
 
-        self.yolo = YOLODetectorService(
-            self.model_path,
-            resolution=self.resolution,
-            imgsz=self.imgsz,
-            confidence=self.conf,
-            tracker=self.tracker
-        )
-        
-        self.ir_sensor = InputDevice(17)
-        
-        self.upload_thread = Thread(
-            target=self._process_upload,
-            name="upload_worker",
-            daemon=True
-        )
-        self.upload_thread.start()
+        if self.inference_scheduler is not None:
+            return self._attach_scheduler()
+
+        if not self._select_model():
+            return False
+
+        if self.inference_process:
+            return self._start_worker()
+
+        report = self.startup_report
+        try:
+            with timed(report, "imports_ms"):
+                from src.services.tracker import Tracker
+                from src.services.yolo_detector_service import YOLODetectorService
+
+            with timed(report, "tracker_load_ms"):
+                tracker = Tracker(self.encoder_model_path, mode=self.settings.tracker_mode)
+            with timed(report, "tracker_warm_up_ms"):
+                tracker.warm_up()
+
+            with timed(report, "detector_load_ms"):
+                yolo = YOLODetectorService(
+                    self.selected_model,
+                    resolution=self.resolution,
+                    imgsz=self.imgsz,
+                    confidence=self.conf,
+                    tracker=tracker
+                )
+            with timed(report, "detector_warm_up_ms"):
+                yolo.warm_up(self._inference_shape())
+        except Exception as e:
+            logging.error(f"Failed to load camera models: {e}")
+            return False
+
+        self.tracker, self.yolo = tracker, yolo
+        # Settings may have changed while the encoder was loading.
+        self.tracker.set_mode(self.settings.tracker_mode)
+        self.models_ready.set()
+        logging.info(f"Camera models ready: {report}")
+        return True
+
+    def _select_model(self) -> bool:
+        override = self.settings.model_override
+
+        try:
+            with timed(self.startup_report, "model_select_ms"):
+                if self.model_path and not override:
+                    self.selected_model = self.model_path
+                    self.model_report = {"selected": self.model_path, "reason": "explicit"}
+                else:
+                    self.selected_model = self.model_registry.select(self.imgsz, self._inference_shape(), override)
+                    self.model_report = self.model_registry.report
+        except Exception as e:
+            logging.error(f"Failed to select a detector model: {e}")
+            return False
+
+        logging.info(f"Detector model: {self.model_report}")
+        if self.mqtt_client:
+            self.mqtt_client.publish(MODEL_TOPIC, json.dumps(self.model_report), retain=True)
+        return True
+
+    def _attach_scheduler(self) -> bool:
+        # The shared detector is loaded once by CameraFleet; each belt only brings its own tracker.
+        report = self.startup_report
+        if not self.inference_scheduler.ready.wait(INFERENCE_READY_TIMEOUT):
+            logging.error(f"Camera {self.camera_id}: shared detector not ready after {INFERENCE_READY_TIMEOUT}s")
+            return False
+
+        try:
+            with timed(report, "imports_ms"):
+                from src.services.tracker import Tracker
+                from src.services.yolo_detector_service import YOLODetectorService
+
+            with timed(report, "tracker_load_ms"):
+                tracker = Tracker(self.encoder_model_path, mode=self.settings.tracker_mode)
+            with timed(report, "tracker_warm_up_ms"):
+                tracker.warm_up()
+
+            yolo = YOLODetectorService(
+                self.selected_model,
+                resolution=self.resolution,
+                imgsz=self.imgsz,
+                confidence=self.conf,
+                tracker=tracker,
+                model=self.inference_scheduler.model,
+            )
+        except Exception as e:
+            logging.error(f"Failed to load camera {self.camera_id} tracker: {e}")
+            return False
+
+        self.tracker, self.yolo = tracker, yolo
+        self.tracker.set_mode(self.settings.tracker_mode)
+        report.update(self.inference_scheduler.report)
+        self.models_ready.set()
+        logging.info(f"Camera {self.camera_id} ready on the shared detector: {report}")
+        return True
+
+    def _start_worker(self) -> bool:
+        worker = InferenceWorker({
+            "model_path": self.selected_model,
+            "encoder_model_path": self.encoder_model_path,
+            "tracker_mode": self.settings.tracker_mode,
+            "resolution": self.resolution,
+            "imgsz": self.imgsz,
+            "conf": self.conf,
+            "inference_shape": self._inference_shape(),
+        })
+
+        with timed(self.startup_report, "worker_start_ms"):
+            started = worker.start()
+        if not started:
+            return False
+
+        self.worker = worker
+        self.startup_report.update(worker.report)
+        self.worker.set_mode(self.settings.tracker_mode)
+        self.models_ready.set()
+        logging.info(f"Camera models ready in worker process: {self.startup_report}")
+        return True
+
+    def _load_models_async(self):
+        if self.models_ready.is_set() or (self.model_loader and self.model_loader.is_alive()):
+            return
+
+        self.model_loader = Thread(target=self.load_models, name="camera_model_loader", daemon=True)
+        self.model_loader.start()
+
+    def _roi(self) -> FrameROI:
+        return FrameROI(self.belt_roi if self.belt_roi is not None else self.settings.belt_roi)
+
+    def _inference_shape(self) -> tuple[int, int]:
+        x1, y1, x2, y2 = self._roi().bounds(self.resolution[::-1])
+        w, h = x2 - x1, y2 - y1
+        scale = min(1.0, self.imgsz / max(w, h))
+        return round(h * scale), round(w * scale)
         
     def update_id(self, new_id: int):
         if isinstance(new_id, int) and new_id > 0:
@@ -83,131 +275,463 @@ class CameraService:
         else:
             logging.warning(f"Ignored invalid feeding ID value: {new_id}")
         
-    def _configure_camera(self):
-        self.picam.preview_configuration.main.size = self.resolution
-        self.picam.preview_configuration.main.format = "RGB888"
-        self.picam.preview_configuration.align()
-        self.picam.preview_configuration.controls = {
-            "HdrMode": controls.HdrModeEnum.SingleExposure,
-            "AfMode": controls.AfModeEnum.Continuous,
-        }
-        self.picam.configure("preview")
-    
-    def _begin_detection(self, frame):
-        detections, metadata = self.yolo.detect(frame)
-        annotated_frame, annotations = self.yolo.draw_detections(frame, detections, metadata)
-        self.frame = annotated_frame if self.settings.status == Status.FEEDING else frame 
-        self.app.frame = self.frame
+    def set_tracker_mode(self, mode: str):
+        if self.worker is not None:
+            self.worker.set_mode(mode)
+        elif self.tracker is not None:
+            self.tracker.set_mode(mode)
 
-        regions = self.yolo.classify_object_region(annotations, frame.shape[1])
-        
-        for region, objects in regions.items():
-            region_has_invalid = any(obj.cls in INVALID_CLASSES for obj in objects)
+    def set_belt_roi(self, roi):
+        # A belt with its own ROI keeps it; the settings ROI only applies to the others.
+        if self.source is None or self.belt_roi is not None:
+            return
+
+        # Inference frames change shape with the ROI, so frame differencing starts over.
+        self.source.set_roi(FrameROI(roi))
+        self.motion_gate.reset()
+
+    def set_detection_stride(self, stride: int):
+        self.stride.set_stride(stride)
+
+    def set_frame_rate(self, target_fps: float, latency_budget_ms: float = None):
+        self.frame_rate.configure(target_fps, latency_budget_ms)
+
+    def _monitor(self):
+        while not self.stop_event.wait(FRAME_RATE_MONITOR_INTERVAL):
+            try:
+                # vcgencmd is a subprocess call, so temperature is polled here and never on the capture path.
+                temperature = to_number(self.device_info.get_cpu_temperature(), default=None)
+                if temperature is not None:
+                    self.frame_rate.update_temperature(temperature)
+
+                if self.mqtt_client:
+                    self.mqtt_client.publish(self._topic(FRAME_RATE_TOPIC), json.dumps(self.frame_rate.stats()))
+                    # With several belts the metrics registry is shared and CameraFleet publishes it once.
+                    if metrics.enabled and self.camera_id is None:
+                        self.mqtt_client.publish(METRICS_TOPIC, json.dumps(metrics.summary()))
+            except Exception as e:
+                logging.error(f"Camera monitor error: {e}")
+
+    def _topic(self, topic: str) -> str:
+        return topic if self.camera_id is None else f"{topic}/{self.camera_id}"
+
+    def _capture_frame(self):
+        self.frame_rate.wait(self.stop_event)
+        if self.stop_event.is_set():
+            return None
+
+        with metrics.time("capture"):
+            captured = self.source.read()
+        if captured is None:
+            return None
+        metrics.inc("frames_captured")
+
+        if self.recorder:
+            self.recorder.record_camera(captured.full)
+
+        self.frame_count += 1
+
+        if "first_frame_ms" not in self.startup_report:
+            self.startup_report["first_frame_ms"] = round((monotonic() - self.stream_started_at) * 1000, 1)
+
+        return FramePacket(self.frame_count, monotonic(), captured.full, source=captured)
+
+    def _run_inference(self, packet: FramePacket):
+        if self.settings.status != Status.FEEDING:
+            self.motion_gate.reset()
+            return packet
+
+        # Frames keep streaming while the models load; detection starts once they are warm.
+        if not self.models_ready.is_set():
+            return packet
+
+        with metrics.time("motion_gate"):
+            detect = self.motion_gate.should_detect(packet.source.inference, has_tracks=bool(self.last_tracks))
+        if not detect:
+            self.stride.reset()
+            return packet
+
+        if self.motion_gate.just_woke:
+            self.stride.reset()
+
+        if self.stride.should_detect(packet.timestamp):
+            metrics.inc("frames_detected")
+            result = self._detect_and_track(packet)
+        else:
+            metrics.inc("frames_predicted")
+            result = self._predict_tracks(packet)
+
+        if result is None:
+            return packet
+
+        packet.annotations, packet.tracks, packet.ended_tracks = result.annotations, result.tracks, result.ended
+        packet.predicted = result.predicted
+        self.last_tracks = packet.tracks
+
+        shape = packet.frame.shape
+        self.stride.adapt(self.rotation.to_display(result.tracks, shape), self.rotation.display_shape(shape)[1], result.uncertainty)
+
+        if self.motion_gate.just_woke and not result.predicted and self._entered_unseen(result.detections, shape):
+            self.motion_gate.record_late_wakeup()
+
+        return packet
+
+    def _detect_and_track(self, packet: FramePacket) -> TrackingResult:
+        if self.worker is not None:
+            with metrics.time("inference_worker"):
+                return self.worker.infer(packet.frame_id, packet.source)
+
+        if self.inference_scheduler is not None:
+            with metrics.time("inference_scheduler"):
+                detections = self.inference_scheduler.detect(self.camera_id, packet.source.inference)
+            if detections is None:
+                return None
+        else:
+            detections = self.yolo.detect(packet.source.inference)
+
+        # Detect and track in the camera's native orientation at full-resolution coordinates.
+        detections = packet.source.to_full(detections)
+        annotations = self.yolo.track(packet.frame, detections)
+
+        return TrackingResult(detections, annotations, self.tracker.tracks, self.tracker.ended, self.tracker.uncertainty)
+
+    def _predict_tracks(self, packet: FramePacket) -> TrackingResult:
+        if self.worker is not None:
+            with metrics.time("inference_worker"):
+                return self.worker.predict(packet.frame_id)
+
+        annotations = self.yolo.predict()
+        return TrackingResult(DetectionBatch(), annotations, self.tracker.tracks, self.tracker.ended, self.tracker.uncertainty, predicted=True)
+
+    def _entered_unseen(self, detections: DetectionBatch, native_shape):
+        # Anything already past the entry third on wake-up slipped in while gated.
+        display_width = self.rotation.display_shape(native_shape)[1]
+        entry_start = (display_width // 3) * 2
+        return bool((self.rotation.to_display(detections, native_shape).centers_x() < entry_start).any())
+
+    def _post_process(self, packet: FramePacket):
+        self.frame = packet.frame
+
+        # Pixels are only rotated and annotated when a viewer is waiting, so drawing runs at the rate viewers consume.
+        if self.app.wants_frame:
+            self.app.publish_frame(self._display_frame(packet))
+
+        if self.settings.status == Status.FEEDING and self.models_ready.is_set():
+            self._begin_detection(packet)
+        else:
+            # Edges seen while not detecting are stale by the time feeding resumes.
+            self.last_beam_check = packet.timestamp
+            if self.track_store:
+                # Feeding ended: items still on the belt belong to this schedule, not the next one.
+                self._flush_tracks()
+
+        latency = monotonic() - packet.timestamp
+        self.frame_rate.observe(latency)
+        metrics.observe("frame_latency", latency)
+
+    def _display_frame(self, packet: FramePacket):
+        shape = packet.frame.shape
+        with metrics.time("rotate"):
+            display = self.rotation.image(packet.frame)
+
+        with metrics.time("draw"):
+            return render_tracks(
+                display,
+                self.rotation.to_display(packet.tracks, shape),
+                self.rotation.to_display(packet.annotations, shape),
+            )
+
+    def _begin_detection(self, packet: FramePacket):
+        frame = packet.frame
+        display_width = self.rotation.display_shape(frame.shape)[1]
+
+        # Region boundaries are defined on the belt as viewers see it; only box coordinates are rotated.
+        with metrics.time("region_logic"):
+            annotations = self.rotation.to_display(packet.annotations, frame.shape)
+            regions = classify_object_region(annotations, display_width)
+
+        edges, beam_broken, matches = self._read_beam(annotations, display_width, packet.timestamp)
+
+        if self.predictive_ejection:
+            self._schedule_ejections(annotations, display_width, packet.timestamp)
+            self._confirm_ejections(annotations, edges, matches)
+
+        # Predicted frames only move boxes and copy the last label, so they neither vote nor offer crops.
+        if not packet.predicted:
+            for obj in annotations:
+                if obj.track_id is not None:
+                    self.track_store.observe(obj.track_id, obj.cls, obj.conf, packet.timestamp)
+
+        # Actuation first so the diverter never waits on crop handling.
+        for region in ("exit", "entry", "middle"):
+            objects = regions[region]
+            region_has_invalid = objects.contains_any(INVALID_CLASSES)
             
             if region == 'entry':
                 pass
 
             if region == 'middle':
-                self._save_image(annotated_frame, objects, region)
+                if not packet.predicted:
+                    with metrics.time("crop_select"):
+                        self._offer_crops(frame, objects)
             
-            elif region == "exit":
-                if self.ir_sensor.is_active:
+            elif region == "exit" and not self.predictive_ejection:
+                # When an edge lines up with a track, that track's class decides instead of the whole exit third.
+                if matches:
+                    region_has_invalid = annotations.select([index for _, index in matches]).contains_any(self.invalid_classes)
+
+                if beam_broken:
                     if region_has_invalid and not self.diverter_locked:
-                        self.uno_serial.send_data("<Conveyor:Eject:0>")
+                        self._send_serial("<Conveyor:Eject:0>")
                         self.diverter_locked = True
 
-                elif self.diverter_locked and not region_has_invalid and self.yolo.exit_clear(regions):
-                    self.uno_serial.send_data("<Conveyor:Eject:90>")
+                elif self.diverter_locked and not region_has_invalid and exit_clear(regions):
+                    self._send_serial("<Conveyor:Eject:90>")
                     
                 self.diverter_locked = False
+
+        for state in self.track_store.pop_finished(packet.ended_tracks, packet.timestamp):
+            self._upload_track(state)
+
+    def _schedule_ejections(self, annotations: DetectionBatch, display_width: int, timestamp: float):
+        # The belt runs toward x=0 in display coordinates, where the exit third and the diverter sit.
+        diverter_x = self.diverter_x * display_width
+
+        for obj in annotations:
+            if obj.track_id is None:
+                continue
+
+            if obj.cls not in self.invalid_classes:
+                self.ejector.cancel(obj.track_id, self.camera_id)
+                continue
+
+            speed = -obj.velocity[0]
+            if speed < MIN_BELT_SPEED:
+                continue
+
+            x1, _, x2, _ = obj.bbox
+            eta = ((x1 + x2) / 2 - diverter_x) / speed
+            if 0 <= eta <= MAX_EJECT_HORIZON:
+                self.ejector.schedule(obj.track_id, timestamp + eta, self.camera_id)
+
+    def _read_beam(self, annotations: DetectionBatch, display_width: int, timestamp: float) -> tuple[list, bool, list]:
+        # Returns the activation edges since the last frame, whether the beam broke, and (edge time, index) pairs matched to tracks.
+        if self.ir_sensor is None:
+            return [], False, []
+
+        edges = self.ir_sensor.activations_between(self.last_beam_check, timestamp)
+        self.last_beam_check = timestamp
+        broken = bool(edges) or self.ir_sensor.active_at(timestamp)
+
+        matches = match_beam_events(
+            edges, annotations, self.diverter_x * display_width, timestamp, IR_MATCH_TOLERANCE * display_width,
+        )
+        self.beam_matches += len(matches)
+        self.beam_unmatched += len(edges) - len(matches)
+        return edges, broken, matches
+
+    def _confirm_ejections(self, annotations: DetectionBatch, edges: list, matches: list):
+        # Each edge scores the window of the track the beam saw; an invalid track the prediction missed or
+        # placed late opens the diverter at the observed arrival.
+        matched_edges = set()
+        for edge_time, index in matches:
+            obj = annotations[index]
+            if obj.track_id is None:
+                continue
+
+            matched_edges.add(edge_time)
+            self.ejector.record_arrival(edge_time, obj.track_id, self.camera_id)
+            if obj.cls in self.invalid_classes:
+                self.ejector.schedule(obj.track_id, edge_time, self.camera_id)
+
+        for edge_time in edges:
+            if edge_time not in matched_edges:
+                self.ejector.record_arrival(edge_time, belt=self.camera_id)
+
+    def _send_serial(self, command: str):
+        with metrics.time("serial_write"):
+            self.uno_serial.send_data(command)
+        metrics.inc("serial_commands")
     
-    def _save_image(self, frame, annotations: list[Metadata], region):
-        for metadata in annotations:
-            if region == "middle" and metadata.track_id not in self.uploaded_ids:
-                h, w = frame.shape[:2]
-                x1, y1, x2, y2 = map(int, metadata.bbox)
-                x1, y1, x2, y2 = expand_crop_box(x1, y1, x2, y2, w, h, margin=0.4)
-                cropped_frame = frame[y1: y2, x1: x2]
-                filename = generate_filename(metadata.track_id, metadata.cls, metadata.conf)
-
-                path = os.path.join(self.output_dir, filename)
-                cv2.imwrite(path, cropped_frame)
-
-                self.entry_info.setdefault(metadata.cls, []).append((metadata.conf, path))
-                self.upload_queue.put(UploadItem(metadata.track_id, metadata.cls, metadata.conf, path))
-                self.uploaded_ids.add(metadata.track_id)
-                
-    def _process_upload(self):
-        self.is_uploading = True
-        
-        while self.is_uploading:
-            try:
-                item = self.upload_queue.get(timeout=1)
-                payload = create_payload(self.system_id, item.cls, item.conf)
+    def _offer_crops(self, frame, annotations: DetectionBatch):
+        native_boxes = self.rotation.boxes_to_native(annotations.boxes, frame.shape)
+        h, w = frame.shape[:2]
 
-                self._send_request(item.path, payload)
-            except Empty:
+        # Every middle-third sighting competes; the track keeps only its sharpest, most confident crop.
+        for metadata, native_box in zip(annotations, native_boxes):
+            state = self.track_store.get(metadata.track_id)
+            if state is None:
                 continue
-            
-    def _stop_uploading(self):
-        self.is_uploading = False
 
-        if self.upload_thread.is_alive():
-            self.upload_thread.join()
+            x1, y1, x2, y2 = map(int, native_box)
+            x1, y1, x2, y2 = expand_crop_box(x1, y1, x2, y2, w, h, margin=0.4)
+            self.track_store.offer_crop(state, frame[y1: y2, x1: x2], metadata.conf)
+
+    def _upload_track(self, state: TrackState):
+        if state.crop is None:
+            return
 
-    def _send_request(self, filepath: str, payload: dict):
+        cls, conf = state.label
+        filename = generate_filename(state.track_id, cls, conf)
+        if self.camera_id is not None:
+            filename = f"{self.camera_id}_{filename}"
+        item = UploadItem(state.track_id, cls, conf, filename, camera_id=self.camera_id)
+
+        if not self.pending_crops.acquire(blocking=False):
+            logging.warning(f"Crop encoder backlog full, dropped track {state.track_id}")
+            metrics.inc("crops_dropped")
+            return
+
+        self.crop_encoder.submit(self._encode_crop, state.crop, item)
+
+    def _flush_tracks(self):
+        for state in self.track_store.drain():
+            self._upload_track(state)
+
+    def _encode_crop(self, cropped_frame, item: UploadItem):
         try:
-            url = f"{os.getenv('SERVER_URL')}/food-waste"
-            with open(filepath, "rb") as f:
-                files = {"file": (os.path.basename(filepath), f, "image/png")}
-                data = {k: str(v) for k, v in payload.items()}
-                r = requests.post(url, files=files, data=data)
-                logging.info(f"Upload response: {r.status_code} - {r.text}")
+            cropped_frame = self.rotation.image(cropped_frame)
+            with metrics.time("crop_encode"):
+                ok, buf = cv2.imencode('.jpg', cropped_frame, [cv2.IMWRITE_JPEG_QUALITY, CROP_JPEG_QUALITY])
+            if not ok:
+                logging.error(f"Failed to encode crop for track {item.track_id}")
+                return
+
+            item.data = buf.tobytes()
+
+            if self.archive_crops:
+                item.path = os.path.join(self.output_dir, item.filename)
+                with metrics.time("imwrite"), open(item.path, "wb") as f:
+                    f.write(item.data)
+
+            self.uploader.submit(item, self.system_id)
+            metrics.inc("crops_submitted")
         except Exception as e:
-            logging.error("Upload error: %s", e)
-    
+            logging.error(f"Crop encoder error: {e}")
+        finally:
+            self.pending_crops.release()
+                
+    def _stop_uploading(self):
+        if self.owns_uploader:
+            self.uploader.stop()
+
+    def _stop_ejector(self):
+        if self.owns_ejector:
+            self.ejector.stop()
+
     def start_stream(self):
         if self.is_running:
             return
     
         self.is_running = True
-        self.picam.start()
-        
-        self.app = FastAPIApp(
-            is_running=self.is_running,
-        )
-        self.app.start_server()
+        self.stream_started_at = monotonic()
+        self.startup_report.pop("first_frame_ms", None)
+
+        # A device that fails to open must not leave is_running set, or every later start is ignored.
+        try:
+            if self.source is None:
+                with timed(self.startup_report, "camera_open_ms"):
+                    self.source = ScaledFrameSource(Picamera2Source(self.resolution, self.camera_num), self.imgsz)
+            self.source.set_roi(self._roi())
+            if self.ir_sensor is None and self.ir_pin is not None:
+                # The IR beam marks real arrival at the diverter; edges are matched to tracks in _read_beam.
+                self.ir_sensor = IRSensor(self.ir_pin, self.ir_backend)
+            self.last_beam_check = monotonic()
+
+            if self.predictive_ejection and self.owns_ejector:
+                self.ejector.start()
+
+            self._load_models_async()
+            self.uploader.start()
+            self.source.start()
+
+            self.app = FastAPIApp(
+                is_running=self.is_running,
+                port=self.stream_port,
+            )
+            self.app.start_server()
+        except Exception as e:
+            logging.error(f"Failed to start camera stream: {e}")
+            self._stop_ejector()
+            self._stop_uploading()
+            self.is_running = False
+            return
+
         logging.info("Camera stream started..")
 
+        self.stop_event.clear()
+        self.stages = [
+            PipelineStage(
+                "capture", self._capture_frame, output_queue=self.capture_queue, stop_event=self.stop_event,
+                max_failures=CAPTURE_MAX_FAILURES,
+            ),
+            PipelineStage("inference", self._run_inference, self.capture_queue, self.result_queue, stop_event=self.stop_event),
+            PipelineStage("post_process", self._post_process, self.result_queue, stop_event=self.stop_event),
+        ]
+
+        self.monitor_thread = Thread(target=self._monitor, name="camera_monitor", daemon=True)
+
         try:
-            while self.is_running:
-                frame = self.picam.capture_array()
-                frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-                
-                if self.settings.status == Status.FEEDING:
-                    self._begin_detection(frame)
-                else:
-                    self.frame = frame
-                    self.app.frame = frame
-                
-                sleep(0.05)
+            for stage in self.stages:
+                stage.start()
+            self.monitor_thread.start()
+
+            self.stop_event.wait()
         except Exception as e:
             logging.error("Stream error: %s", e)
         finally:
             self.stop_stream()
+            self._flush_tracks()
             self._stop_uploading()
+
+    def pipeline_stats(self) -> dict:
+        stats = {stage.name: stage.stats() for stage in self.stages}
+        stats["motion_gate"] = self.motion_gate.stats()
+        stats["uploader"] = self.uploader.stats()
+        stats["frame_rate"] = self.frame_rate.stats()
+        stats["ejection"] = self.ejector.stats()
+        stats["tracks"] = self.track_store.stats()
+        stats["detection_stride"] = self.stride.stats()
+        if self.ir_sensor is not None:
+            stats["ir_sensor"] = dict(self.ir_sensor.stats(), matched=self.beam_matches, unmatched=self.beam_unmatched)
+        stats["startup"] = dict(self.startup_report)
+        stats["model"] = dict(self.model_report)
+        if self.worker is not None:
+            stats["inference_worker"] = self.worker.stats()
+        if self.inference_scheduler is not None:
+            stats["inference_scheduler"] = self.inference_scheduler.stats()["cameras"].get(self.camera_id, {})
+        return stats
         
     def stop_stream(self):
         if not self.is_running:
             return
                 
         self.is_running = False
+        self.stop_event.set()
         logging.info("Stopping camera stream...")
+
+        for stage in self.stages:
+            stage.join()
+        if self.monitor_thread and self.monitor_thread.is_alive():
+            self.monitor_thread.join(timeout=2)
+        self._stop_ejector()
         
         try:
             self.app.stop_server()
-            self.picam.stop()
+            self.source.stop()
             cv2.destroyAllWindows()
             logging.info("Camera stopped successfully")
         except Exception as e:
-            logging.error(f"Failed to stop camera: {e}")
\ No newline at end of file
+            logging.error(f"Failed to stop camera: {e}")
+
+    def shutdown(self):
+        self.stop_stream()
+
+        if self.ir_sensor is not None:
+            self.ir_sensor.close()
+            self.ir_sensor = None
+
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+            self.models_ready.clear()
\ No newline at end of file
@@ -0,0 +1,90 @@
+import logging
+import numpy as np
+
+from src.lib.constants import DETECTION_STRIDE, STRIDE_UNCERTAINTY_LIMIT, STRIDE_BOUNDARY_MARGIN, DIVERTER_X
+from src.lib.entities import DetectionBatch
+
+
+class DetectionStride:
+    def __init__(
+        self,
+        stride: int = DETECTION_STRIDE,
+        uncertainty_limit: float = STRIDE_UNCERTAINTY_LIMIT,
+        boundary_margin: float = STRIDE_BOUNDARY_MARGIN,
+        diverter_x: float = DIVERTER_X,
+    ):
+        self.stride = stride
+        self.uncertainty_limit = uncertainty_limit
+        self.boundary_margin = boundary_margin
+        self.diverter_x = diverter_x
+
+        self.current = 1
+        self.since_detection = 0
+        self.frame_period = None
+        self.last_timestamp = None
+
+        self.detected = 0
+        self.predicted = 0
+        self.boundary_hits = 0
+
+    def set_stride(self, stride: int):
+        stride = max(1, int(stride))
+        if stride != self.stride:
+            logging.info(f"Detection stride set to {stride}")
+        self.stride = stride
+        self.current = min(self.current, stride)
+
+    def reset(self):
+        self.current = 1
+        self.since_detection = 0
+        self.last_timestamp = None
+
+    def should_detect(self, timestamp: float) -> bool:
+        if self.last_timestamp is not None:
+            dt = timestamp - self.last_timestamp
+            self.frame_period = dt if self.frame_period is None else self.frame_period + 0.2 * (dt - self.frame_period)
+        self.last_timestamp = timestamp
+
+        if self.since_detection + 1 >= self.current:
+            self.since_detection = 0
+            self.detected += 1
+            return True
+
+        self.since_detection += 1
+        self.predicted += 1
+        return False
+
+    def adapt(self, tracks: DetectionBatch, display_width: int, uncertainty: float):
+        # tracks are in display coordinates, where region thirds and the diverter are defined.
+        if self.stride <= 1 or uncertainty >= self.uncertainty_limit or self._near_boundary(tracks, display_width):
+            self.current = 1
+            return
+
+        self.current = int(np.clip(round(self.stride * (1 - uncertainty / self.uncertainty_limit)), 1, self.stride))
+
+    def _near_boundary(self, tracks: DetectionBatch, display_width: int) -> bool:
+        if not tracks:
+            return False
+
+        boundaries = np.array((display_width / 3, display_width * 2 / 3, self.diverter_x * display_width), dtype=np.float32)
+        distance = np.abs(tracks.centers_x()[:, None] - boundaries[None, :]).min(axis=1)
+
+        # A track that could reach a boundary before the next full detection counts as already there.
+        lookahead = self.stride * (self.frame_period or 0.0)
+        reach = self.boundary_margin * display_width + np.abs(tracks.velocities[:, 0]) * lookahead
+
+        near = bool((distance < reach).any())
+        if near:
+            self.boundary_hits += 1
+        return near
+
+    def stats(self) -> dict:
+        total = self.detected + self.predicted
+        return {
+            "stride": self.stride,
+            "current": self.current,
+            "detected": self.detected,
+            "predicted": self.predicted,
+            "detect_ratio": round(self.detected / total, 3) if total else 0.0,
+            "boundary_hits": self.boundary_hits,
+        }
@@ -0,0 +1,187 @@
+import logging
+from collections import deque
+from dataclasses import dataclass
+from threading import Condition, Thread
+from time import monotonic
+
+from src.lib.constants import (
+    EJECT_LEAD_TIME,
+    EJECT_HOLD_TIME,
+    EJECT_SPIN_TIME,
+    EJECT_OPEN_COMMAND,
+    EJECT_CLOSE_COMMAND,
+)
+
+
+@dataclass
+class EjectionWindow:
+    track_id: int
+    arrival: float
+    open_at: float
+    close_at: float
+    arrived: bool = False
+    belt: str = None
+
+
+class EjectionScheduler:
+    def __init__(
+        self,
+        send,
+        lead_time: float = EJECT_LEAD_TIME,
+        hold_time: float = EJECT_HOLD_TIME,
+        spin_time: float = EJECT_SPIN_TIME,
+    ):
+        # send(command) writes to the diverter; times are time.monotonic() like FramePacket.timestamp.
+        self.send = send
+        self.lead_time = lead_time
+        self.hold_time = hold_time
+        self.spin_time = spin_time
+
+        # Keyed by (belt, track_id): belts sharing the diverter reuse the same track ids.
+        self.windows = {}
+        self.is_open = False
+        self.commands = 0
+        self.dispatch_errors = deque(maxlen=200)
+        self.arrival_errors = deque(maxlen=200)
+
+        self._cond = Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._running = True
+        self._thread = Thread(target=self._run, name="ejection_scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self.windows.clear()
+            self._cond.notify()
+
+        if self._thread:
+            self._thread.join(timeout=2)
+
+        if self.is_open:
+            self.send(EJECT_CLOSE_COMMAND)
+            self.is_open = False
+
+    def schedule(self, track_id: int, arrival: float, belt: str = None):
+        with self._cond:
+            window = self.windows.get((belt, track_id))
+            now = monotonic()
+
+            if window is not None and window.open_at <= now:
+                # Already open: only a later arrival can still move the close time.
+                window.arrival = arrival
+                window.close_at = max(window.close_at, arrival + self.hold_time)
+            else:
+                self.windows[(belt, track_id)] = EjectionWindow(
+                    track_id, arrival, arrival - self.lead_time, arrival + self.hold_time, belt=belt,
+                )
+
+            self._cond.notify()
+
+    def cancel(self, track_id: int, belt: str = None):
+        with self._cond:
+            window = self.windows.get((belt, track_id))
+            if window is not None and window.open_at > monotonic():
+                del self.windows[(belt, track_id)]
+                self._cond.notify()
+
+    def record_arrival(self, timestamp: float, track_id: int = None, belt: str = None) -> bool:
+        # With a track_id the edge was matched by position, so it scores that track's window; otherwise the nearest
+        # in time on the same belt.
+        with self._cond:
+            window = self.windows.get((belt, track_id)) if track_id is not None else None
+            if window is None or window.arrived:
+                candidates = [
+                    w for w in self.windows.values()
+                    if w.belt == belt and not w.arrived and w.open_at <= timestamp <= w.close_at
+                ]
+                if track_id is not None or not candidates:
+                    return False
+                window = min(candidates, key=lambda w: abs(timestamp - w.arrival))
+            window.arrived = True
+
+        error = timestamp - window.arrival
+        self.arrival_errors.append(error)
+        belt = "" if window.belt is None else f"{window.belt}/"
+        logging.info(f"Ejection arrival for track {belt}{window.track_id}: {error * 1000:+.1f} ms from prediction")
+        return True
+
+    def _state_at(self, now: float):
+        # Returns whether the diverter should be open, the boundary that made it so and the next boundary.
+        active = [w for w in self.windows.values() if w.open_at <= now < w.close_at]
+        should_open = bool(active)
+
+        if should_open:
+            boundary = max(w.open_at for w in active)
+        else:
+            closed = [w.close_at for w in self.windows.values() if w.close_at <= now]
+            boundary = max(closed) if closed else now
+
+        upcoming = [t for w in self.windows.values() for t in (w.open_at, w.close_at) if t > now]
+        return should_open, boundary, min(upcoming) if upcoming else None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+
+                now = monotonic()
+                # Closed windows linger briefly so a late IR edge can still be matched.
+                for key in [k for k, w in self.windows.items() if w.close_at < now - self.hold_time]:
+                    del self.windows[key]
+
+                should_open, boundary, next_boundary = self._state_at(now)
+                changed = should_open != self.is_open
+                self.is_open = should_open
+
+                if not changed:
+                    if next_boundary is None:
+                        self._cond.wait()
+                        continue
+
+                    delay = next_boundary - now
+                    if delay > self.spin_time:
+                        self._cond.wait(delay - self.spin_time)
+                        continue
+
+            if changed:
+                self._dispatch(EJECT_OPEN_COMMAND if should_open else EJECT_CLOSE_COMMAND, boundary)
+                continue
+
+            # Condition waits are only as precise as the scheduler tick; spin the last couple of ms.
+            while monotonic() < next_boundary:
+                pass
+
+    def _dispatch(self, command: str, due: float):
+        try:
+            self.send(command)
+        except Exception as e:
+            logging.error(f"Ejection command {command} failed: {e}")
+            return
+
+        error = monotonic() - due
+        self.commands += 1
+        self.dispatch_errors.append(error)
+        logging.info(f"Ejection {command} sent {error * 1000:+.2f} ms from schedule")
+
+    def stats(self) -> dict:
+        dispatch = list(self.dispatch_errors)
+        arrival = list(self.arrival_errors)
+
+        return {
+            "commands": self.commands,
+            "pending": len(self.windows),
+            "open": self.is_open,
+            "dispatch_error_ms": round(sum(dispatch) / len(dispatch) * 1000, 2) if dispatch else None,
+            "dispatch_error_max_ms": round(max(dispatch) * 1000, 2) if dispatch else None,
+            "arrival_error_ms": round(sum(arrival) / len(arrival) * 1000, 2) if arrival else None,
+            "arrival_abs_error_ms": round(sum(abs(e) for e in arrival) / len(arrival) * 1000, 2) if arrival else None,
+        }
@@ -1,16 +1,21 @@
+import asyncio
 import logging
-import cv2
-from time import sleep
 from threading import Thread
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import PlainTextResponse
 from uvicorn import Server, Config
 from dataclasses import dataclass, field
-from fastapi.responses import StreamingResponse
+
+from src.services.frame_broadcaster import FrameBroadcaster
+from src.services.metrics import metrics
+from src.services.mjpeg_stream import FrameMailbox, MJPEGStreamingResponse
 
 
 @dataclass
 class FastAPIApp:
-    frame: any = field(init=False)
+    frame: any = field(init=False, default=None)
+    broadcaster: FrameBroadcaster = field(default_factory=FrameBroadcaster)
     
     app: FastAPI = field(init=False)
     uvicorn_server: Server = field(init=False)
@@ -20,27 +25,112 @@ class FastAPIApp:
     port: int = 8080
     
     is_running: bool = False
+    idle_timeout: float = 10.0
+    send_timeout: float = 5.0
+
+    loop: asyncio.AbstractEventLoop = field(init=False, default=None)
+    frame_ready: asyncio.Event = field(init=False, default=None)
+    subscribers: set = field(init=False, default_factory=set)
 
     def __post_init__(self):
-        self.app = FastAPI()
+        self.app = FastAPI(lifespan=self._lifespan)
         self._register_routes()
 
+    @asynccontextmanager
+    async def _lifespan(self, app):
+        self.loop = asyncio.get_running_loop()
+        self.frame_ready = asyncio.Event()
+        producer = asyncio.create_task(self._broadcast_loop())
+        try:
+            yield
+        finally:
+            producer.cancel()
+            self.loop = None
+
     def _register_routes(self):
         @self.app.get("/video_feed")
-        def video_feed():
-            return StreamingResponse(
-                self._frame_generator(),
-                media_type="multipart/x-mixed-replace; boundary=frame"
+        async def video_feed(
+            request: Request,
+            width: int | None = Query(None, gt=0),
+            quality: int | None = Query(None, ge=10, le=95),
+        ):
+            mailbox = FrameMailbox(width, quality)
+            return MJPEGStreamingResponse(
+                self._frame_consumer(request, mailbox),
+                send_timeout=self.send_timeout,
             )
+
+        @self.app.get("/metrics")
+        def prometheus_metrics():
+            return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    @property
+    def has_viewers(self) -> bool:
+        return bool(self.subscribers)
+
+    @property
+    def wants_frame(self) -> bool:
+        # A viewer that already holds the latest version and is blocked waiting asks for one more frame.
+        version = self.broadcaster.version
+        return any(mailbox.waiting and mailbox.version == version for mailbox in tuple(self.subscribers))
+
+    def publish_frame(self, frame):
+        self.frame = frame
+        self.broadcaster.publish(frame)
+
+        loop = self.loop
+        if loop is not None and self.subscribers:
+            loop.call_soon_threadsafe(self.frame_ready.set)
+
+    async def _broadcast_loop(self):
+        while True:
+            await self.frame_ready.wait()
+            self.frame_ready.clear()
+
+            # Only viewers behind the current version are fed; unchanged frames are never re-sent.
+            pending = [m for m in self.subscribers if m.version != self.broadcaster.version]
+            for variant in {mailbox.variant for mailbox in pending}:
+                try:
+                    version, jpeg = await asyncio.to_thread(self.broadcaster.get_jpeg, *variant)
+                except Exception as e:
+                    logging.error(f"Frame encode error: {e}")
+                    continue
+
+                if jpeg is None:
+                    continue
+
+                for mailbox in pending:
+                    if mailbox.variant == variant and mailbox.version != version:
+                        mailbox.offer(version, jpeg)
+
+    async def _frame_consumer(self, request: Request, mailbox: FrameMailbox):
+        self.subscribers.add(mailbox)
+        if self.broadcaster.version:
+            self.frame_ready.set()
+
+        try:
+            while self.is_running:
+                try:
+                    jpeg = await mailbox.get(timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    logging.info("No frames for viewer within idle timeout, closing feed.")
+                    break
+
+                if jpeg is None:
+                    break
+
+                if await request.is_disconnected():
+                    break
+
+                yield b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n'
+        finally:
+            self.subscribers.discard(mailbox)
+            logging.info(f"Viewer left: {mailbox.delivered} frames sent, {mailbox.skipped} skipped")
             
-    def _frame_generator(self):
-        while self.is_running:
-            if self.frame is not None:
-                _, buf = cv2.imencode('.jpg', self.frame)
-                yield b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + buf.tobytes() + b'\r\n'
-                
-            sleep(1 / 30)
-            
+    def _close_viewers(self):
+        for mailbox in tuple(self.subscribers):
+            mailbox.close()
+
     def start_server(self):
         def _serve():
             config = Config(app=self.app, host=self.host, port=self.port, log_level="info", access_log=False)
@@ -58,6 +148,11 @@ class FastAPIApp:
         self.is_running = False
         
         try:
+            # uvicorn waits for open responses before shutting down, so blocked viewers are released first.
+            loop = self.loop
+            if loop is not None:
+                loop.call_soon_threadsafe(self._close_viewers)
+
             if hasattr(self, 'uvicorn_server'):
                 self.uvicorn_server.should_exit = True
 
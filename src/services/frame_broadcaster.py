@@ -0,0 +1,64 @@
+import cv2
+from threading import Lock
+
+
+class FrameBroadcaster:
+    def __init__(self, default_quality: int = 80):
+        self.default_quality = default_quality
+        self.version = 0
+        self.encode_count = 0
+
+        self._frame = None
+        self._lock = Lock()
+        self._encode_lock = Lock()
+        self._encoded_version = 0
+        self._encoded = {}
+
+    def publish(self, frame):
+        with self._lock:
+            self._frame = frame
+            self.version += 1
+
+    def get_jpeg(self, width: int = None, quality: int = None) -> tuple[int, bytes]:
+        with self._lock:
+            frame, version = self._frame, self.version
+
+        if frame is None:
+            return version, None
+
+        key = self._variant_key(frame, width, quality)
+
+        # One encode per (version, variant); every other client reuses the bytes.
+        with self._encode_lock:
+            if self._encoded_version != version:
+                self._encoded_version = version
+                self._encoded = {}
+
+            jpeg = self._encoded.get(key)
+            if jpeg is None:
+                jpeg = self._encode(frame, *key)
+                self._encoded[key] = jpeg
+                self.encode_count += 1
+
+        return version, jpeg
+
+    def _variant_key(self, frame, width, quality):
+        frame_width = frame.shape[1]
+        width = frame_width if not width or width >= frame_width else int(width)
+        quality = int(quality or self.default_quality)
+        return width, max(10, min(quality, 95))
+
+    def _encode(self, frame, width, quality):
+        h, w = frame.shape[:2]
+        if width != w:
+            frame = cv2.resize(frame, (width, int(h * width / w)), interpolation=cv2.INTER_AREA)
+
+        ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return buf.tobytes() if ok else None
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "encode_count": self.encode_count,
+            "variants": len(self._encoded),
+        }
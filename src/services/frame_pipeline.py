@@ -0,0 +1,156 @@
+import logging
+from collections import deque
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from time import monotonic, perf_counter
+
+from src.lib.constants import STAGE_ERROR_BACKOFF, STAGE_ERROR_BACKOFF_MAX
+
+
+class LatestFrameQueue(Queue):
+    def __init__(self, maxsize: int = 1, lossless: bool = False):
+        super().__init__(maxsize=maxsize)
+        self.dropped = 0
+        # Replays need every frame processed, so a lossless queue applies backpressure instead of dropping.
+        self.lossless = lossless
+
+    def put_latest(self, item, timeout: float = None):
+        if self.lossless:
+            self.put(item, timeout=timeout)
+            return
+
+        # Never blocks the producer: a full queue gives up its oldest entry.
+        with self.not_full:
+            if self.maxsize > 0 and self._qsize() >= self.maxsize:
+                self._get()
+                self.dropped += 1
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+
+class ThroughputMeter:
+    def __init__(self, window: int = 30):
+        self.processed = 0
+        self.timestamps = deque(maxlen=window)
+        self.durations = deque(maxlen=window)
+        self._lock = Lock()
+
+    def mark(self, duration: float):
+        with self._lock:
+            self.processed += 1
+            self.timestamps.append(monotonic())
+            self.durations.append(duration)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            timestamps = list(self.timestamps)
+            durations = list(self.durations)
+            processed = self.processed
+
+        fps = 0.0
+        if len(timestamps) > 1 and timestamps[-1] > timestamps[0]:
+            fps = (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+
+        avg_ms = (sum(durations) / len(durations)) * 1000 if durations else 0.0
+
+        return {
+            "processed": processed,
+            "fps": round(fps, 2),
+            "avg_ms": round(avg_ms, 2),
+        }
+
+
+class PipelineStage:
+    def __init__(
+        self,
+        name: str,
+        handler,
+        input_queue: Queue = None,
+        output_queue: LatestFrameQueue = None,
+        stop_event: Event = None,
+        poll_timeout: float = 0.1,
+        max_failures: int = None,
+        backoff: float = STAGE_ERROR_BACKOFF,
+        backoff_max: float = STAGE_ERROR_BACKOFF_MAX,
+    ):
+        self.name = name
+        self.handler = handler
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.stop_event = stop_event or Event()
+        self.poll_timeout = poll_timeout
+        self.max_failures = max_failures
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.failures = 0
+        self.errors = 0
+        self.meter = ThroughputMeter()
+        self.thread = None
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+
+        self.thread = Thread(target=self._run, name=f"pipeline_{self.name}", daemon=True)
+        self.thread.start()
+
+    def join(self, timeout: float = 2):
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+            if self.thread.is_alive():
+                logging.warning(f"[Pipeline] Stage '{self.name}' did not stop within timeout.")
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            if self.input_queue is not None:
+                try:
+                    item = self.input_queue.get(timeout=self.poll_timeout)
+                except Empty:
+                    continue
+                args = (item,)
+            else:
+                args = ()
+
+            start = perf_counter()
+            try:
+                result = self.handler(*args)
+            except Exception as e:
+                self._on_error(e)
+                continue
+
+            self.failures = 0
+            self.meter.mark(perf_counter() - start)
+
+            if result is not None and self.output_queue is not None:
+                self._emit(result)
+
+    def _emit(self, result):
+        while not self.stop_event.is_set():
+            try:
+                self.output_queue.put_latest(result, timeout=self.poll_timeout)
+                return
+            except Full:
+                continue
+
+    def _on_error(self, error: Exception):
+        self.failures += 1
+        self.errors += 1
+        logging.error(f"[Pipeline] Stage '{self.name}' error ({self.failures} in a row): {error}")
+
+        if self.max_failures is not None and self.failures >= self.max_failures:
+            logging.error(f"[Pipeline] Stage '{self.name}' failed {self.failures} times in a row, stopping pipeline")
+            self.stop_event.set()
+            return
+
+        # Back off so a persistent fault neither spins the CPU nor floods the log.
+        self.stop_event.wait(min(self.backoff * 2 ** (self.failures - 1), self.backoff_max))
+
+    def stats(self) -> dict:
+        stats = self.meter.snapshot()
+        stats["errors"] = self.errors
+        if self.input_queue is not None:
+            stats["queue_depth"] = self.input_queue.qsize()
+        if isinstance(self.input_queue, LatestFrameQueue):
+            stats["dropped"] = self.input_queue.dropped
+        return stats
@@ -0,0 +1,115 @@
+import logging
+from threading import Event, Lock
+from time import monotonic
+
+from src.lib.constants import (
+    TARGET_FPS,
+    LATENCY_BUDGET_MS,
+    THROTTLE_TEMP,
+    THROTTLE_RELEASE_TEMP,
+    THROTTLE_FPS,
+    MIN_FPS,
+)
+from src.services.frame_pipeline import ThroughputMeter
+
+
+class FrameRateController:
+    def __init__(
+        self,
+        target_fps: float = TARGET_FPS,
+        latency_budget_ms: float = LATENCY_BUDGET_MS,
+        throttle_temp: float = THROTTLE_TEMP,
+        throttle_release_temp: float = THROTTLE_RELEASE_TEMP,
+        throttle_fps: float = THROTTLE_FPS,
+        min_fps: float = MIN_FPS,
+        smoothing: float = 0.2,
+    ):
+        self.throttle_temp = throttle_temp
+        self.throttle_release_temp = throttle_release_temp
+        self.throttle_fps = throttle_fps
+        self.min_fps = min_fps
+        self.smoothing = smoothing
+
+        self.target_fps = None
+        self.latency_budget = None
+        self.interval = 0.0
+        self.next_deadline = 0.0
+        self.latency = None
+        self.temperature = None
+        self.throttled = False
+        self.throttle_events = 0
+
+        self.meter = ThroughputMeter()
+        self._lock = Lock()
+        self.configure(target_fps, latency_budget_ms)
+
+    def configure(self, target_fps: float = None, latency_budget_ms: float = None):
+        # target_fps caps the capture rate (0/None = camera rate); the latency budget can only slow it further.
+        with self._lock:
+            self.target_fps = target_fps if target_fps and target_fps > 0 else None
+            self.latency_budget = latency_budget_ms / 1000 if latency_budget_ms and latency_budget_ms > 0 else None
+            self.interval = self._floor_interval()
+
+        logging.info(f"Frame rate target: {self.target_fps or 'camera'} fps, latency budget: {latency_budget_ms or 'none'} ms")
+
+    def _floor_interval(self) -> float:
+        fps = self.target_fps
+        if self.throttled:
+            fps = min(fps, self.throttle_fps) if fps else self.throttle_fps
+        return 1 / fps if fps else 0.0
+
+    def wait(self, stop_event: Event):
+        with self._lock:
+            delay = self.next_deadline - monotonic()
+
+        if delay > 0:
+            stop_event.wait(delay)
+
+        with self._lock:
+            # A late frame restarts the schedule rather than bursting to catch up.
+            self.next_deadline = max(self.next_deadline + self.interval, monotonic())
+
+    def observe(self, latency: float):
+        self.meter.mark(latency)
+
+        with self._lock:
+            self.latency = latency if self.latency is None else self.latency + self.smoothing * (latency - self.latency)
+
+            floor = self._floor_interval()
+            if self.latency_budget is None:
+                self.interval = floor
+            elif self.latency > self.latency_budget:
+                self.interval = min(max(self.interval, 1 / 30) * 1.25, 1 / self.min_fps)
+            elif self.latency < self.latency_budget * 0.8:
+                self.interval = max(self.interval * 0.95, floor)
+
+    def update_temperature(self, celsius: float):
+        with self._lock:
+            self.temperature = celsius
+
+            if not self.throttled and celsius >= self.throttle_temp:
+                self.throttled = True
+                self.throttle_events += 1
+                logging.warning(f"CPU at {celsius:.1f}°C, throttling camera to {self.throttle_fps} fps")
+            elif self.throttled and celsius <= self.throttle_release_temp:
+                self.throttled = False
+                logging.info(f"CPU at {celsius:.1f}°C, camera throttle released")
+            else:
+                return
+
+            self.interval = max(self.interval, self._floor_interval()) if self.throttled else self._floor_interval()
+
+    def stats(self) -> dict:
+        snapshot = self.meter.snapshot()
+
+        with self._lock:
+            return {
+                "effective_fps": snapshot["fps"],
+                "target_fps": self.target_fps,
+                "scheduled_fps": round(1 / self.interval, 2) if self.interval else None,
+                "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None,
+                "latency_budget_ms": self.latency_budget * 1000 if self.latency_budget else None,
+                "temperature": self.temperature,
+                "throttled": self.throttled,
+                "throttle_events": self.throttle_events,
+            }
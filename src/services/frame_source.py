@@ -0,0 +1,112 @@
+import cv2
+from queue import Empty, Queue
+
+from src.lib.entities import SourceFrame
+from src.lib.utils import FrameROI
+
+
+class FrameSource:
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def read(self) -> SourceFrame:
+        raise NotImplementedError("Subclass must implement read()")
+
+    def set_roi(self, roi: FrameROI):
+        pass
+
+
+class Picamera2Source(FrameSource):
+    def __init__(self, resolution: tuple[int, int], camera_num: int = 0):
+        self.resolution = resolution
+        self.camera_num = camera_num
+
+        # Imported here so replay and other backends run on machines without libcamera.
+        from picamera2 import Picamera2
+        self.picam = Picamera2(camera_num)
+        self._configure_camera()
+
+    def _configure_camera(self):
+        from libcamera import controls
+
+        self.picam.preview_configuration.main.size = self.resolution
+        self.picam.preview_configuration.main.format = "RGB888"
+        self.picam.preview_configuration.align()
+        self.picam.preview_configuration.controls = {
+            "HdrMode": controls.HdrModeEnum.SingleExposure,
+            "AfMode": controls.AfModeEnum.Continuous,
+        }
+        self.picam.configure("preview")
+
+    def start(self):
+        self.picam.start()
+
+    def stop(self):
+        self.picam.stop()
+
+    def read(self) -> SourceFrame:
+        frame = self.picam.capture_array()
+        return SourceFrame(full=frame, inference=frame)
+
+
+class ReplayFrameSource(FrameSource):
+    def __init__(self, maxsize: int = 2, timeout: float = 0.5):
+        self.frames = Queue(maxsize=maxsize)
+        self.timeout = timeout
+
+    def push(self, frame):
+        # Blocks the replay driver; with lossless stage queues the whole pipeline paces it and no frame is dropped.
+        self.frames.put(frame)
+
+    def read(self) -> SourceFrame:
+        try:
+            frame = self.frames.get(timeout=self.timeout)
+        except Empty:
+            return None
+
+        return SourceFrame(full=frame, inference=frame)
+
+
+class ScaledFrameSource(FrameSource):
+    def __init__(self, source: FrameSource, inference_size: int, roi: FrameROI = None):
+        self.source = source
+        self.inference_size = inference_size
+        self.roi = roi or FrameROI()
+
+    def set_roi(self, roi: FrameROI):
+        self.roi = roi
+
+    def start(self):
+        self.source.start()
+
+    def stop(self):
+        self.source.stop()
+
+    def read(self) -> SourceFrame:
+        captured = self.source.read()
+        if captured is None:
+            return None
+
+        full = captured.full
+        roi = self.roi
+
+        # Only the belt strip reaches the detector, so its input resolution is spent on the belt.
+        x1, y1, x2, y2 = roi.bounds(full.shape)
+        region = full[y1: y2, x1: x2]
+        h, w = region.shape[:2]
+
+        scale = self.inference_size / max(h, w)
+        if scale >= 1:
+            inference, sx, sy = region, 1.0, 1.0
+        else:
+            # Software downscale so any backend can feed the detector at its input size.
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            inference = cv2.resize(region, size, interpolation=cv2.INTER_AREA)
+            sx, sy = w / size[0], h / size[1]
+
+        inference = roi.mask(inference, full.shape, (x1, y1), (sx, sy))
+
+        return SourceFrame(full=full, inference=inference, scale=(sx, sy), offset=(float(x1), float(y1)))
@@ -0,0 +1,191 @@
+import logging
+import numpy as np
+from collections import deque
+from dataclasses import dataclass, field
+from threading import Condition, Event, Thread
+from time import monotonic
+
+from src.lib.constants import INFERENCE_BATCH_SIZE, INFERENCE_BATCH_WAIT, INFERENCE_RESULT_TIMEOUT
+from src.lib.entities import DetectionBatch
+from src.services.frame_pipeline import ThroughputMeter
+from src.services.metrics import metrics
+
+
+@dataclass
+class InferenceRequest:
+    camera_id: str
+    image: any
+    submitted: float
+    done: Event = field(default_factory=Event)
+    detections: DetectionBatch = None
+
+
+class InferenceScheduler:
+    def __init__(
+        self,
+        batch_size: int = INFERENCE_BATCH_SIZE,
+        batch_wait: float = INFERENCE_BATCH_WAIT,
+        timeout: float = INFERENCE_RESULT_TIMEOUT,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self.timeout = timeout
+
+        self.model = None
+        self.imgsz = 640
+        self.confidence = 0.8
+        self.ready = Event()
+        self.report = {}
+
+        # Each camera waits on its own request, so at most one is pending per camera.
+        self.order = deque()
+        self.pending = {}
+        self.meters = {}
+        self.waits = {}
+        self.served = {}
+        self.timeouts = {}
+        self.batches = 0
+        self.batched_frames = 0
+
+        self._cond = Condition()
+        self._running = False
+        self._thread = None
+
+    def register(self, camera_id: str):
+        with self._cond:
+            if camera_id in self.meters:
+                return
+            self.order.append(camera_id)
+            self.meters[camera_id] = ThroughputMeter()
+            self.waits[camera_id] = deque(maxlen=30)
+            self.served[camera_id] = 0
+            self.timeouts[camera_id] = 0
+
+    def load(self, model_path: str, imgsz: int, confidence: float, shape: tuple[int, int]):
+        from ultralytics import YOLO
+
+        start = monotonic()
+        model = YOLO(model_path, task="detect")
+        self.report["detector_load_ms"] = round((monotonic() - start) * 1000, 1)
+
+        start = monotonic()
+        dummy = np.zeros((*shape, 3), dtype=np.uint8)
+        for _ in range(2):
+            model([dummy] * self.batch_size, conf=confidence, imgsz=imgsz, verbose=False, show=False)
+        self.report["detector_warm_up_ms"] = round((monotonic() - start) * 1000, 1)
+
+        self.model, self.imgsz, self.confidence = model, imgsz, confidence
+        self.ready.set()
+        logging.info(f"Shared detector ready for {len(self.order)} cameras: {self.report}")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._running = True
+        self._thread = Thread(target=self._run, name="inference_scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            for request in self.pending.values():
+                request.done.set()
+            self.pending.clear()
+            self._cond.notify_all()
+
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def detect(self, camera_id: str, image) -> DetectionBatch:
+        request = InferenceRequest(camera_id, image, monotonic())
+
+        with self._cond:
+            if not self._running:
+                return None
+            self.pending[camera_id] = request
+            self._cond.notify_all()
+
+        if not request.done.wait(self.timeout):
+            with self._cond:
+                if self.pending.get(camera_id) is request:
+                    del self.pending[camera_id]
+                self.timeouts[camera_id] += 1
+            return None
+
+        return request.detections
+
+    def _next_batch(self) -> list[InferenceRequest]:
+        # Round robin: start after the camera served last, so a fast belt cannot starve a slow one.
+        batch = []
+        for _ in range(len(self.order)):
+            camera_id = self.order[0]
+            self.order.rotate(-1)
+
+            request = self.pending.pop(camera_id, None)
+            if request is not None:
+                batch.append(request)
+                if len(batch) == self.batch_size:
+                    break
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self.pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+
+                # Give the other belts a few ms to join the batch before paying for a partial one.
+                wanted = min(self.batch_size, len(self.order))
+                deadline = monotonic() + self.batch_wait
+                while self._running and len(self.pending) < wanted and monotonic() < deadline:
+                    self._cond.wait(deadline - monotonic())
+
+                batch = self._next_batch()
+
+            if batch:
+                self._execute(batch)
+
+    def _execute(self, batch: list[InferenceRequest]):
+        started = monotonic()
+        try:
+            with metrics.time("yolo"):
+                results = self.model([r.image for r in batch], conf=self.confidence, imgsz=self.imgsz, verbose=False, show=False)
+
+            for request, result in zip(batch, results):
+                request.detections = DetectionBatch.from_xyxy_conf_cls(result.boxes.numpy().data, names=self.model.names)
+                metrics.inc("detections", len(request.detections))
+        except Exception as e:
+            logging.error(f"Shared inference failed for {[r.camera_id for r in batch]}: {e}")
+
+        finished = monotonic()
+        self.batches += 1
+        self.batched_frames += len(batch)
+
+        for request in batch:
+            self.meters[request.camera_id].mark(finished - started)
+            self.waits[request.camera_id].append(started - request.submitted)
+            self.served[request.camera_id] += 1
+            request.done.set()
+
+    def stats(self) -> dict:
+        cameras = {}
+        for camera_id in list(self.order):
+            snapshot = self.meters[camera_id].snapshot()
+            waits = list(self.waits[camera_id])
+            cameras[camera_id] = {
+                "served": self.served[camera_id],
+                "fps": snapshot["fps"],
+                "inference_ms": snapshot["avg_ms"],
+                "queue_wait_ms": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                "timeouts": self.timeouts[camera_id],
+            }
+
+        return {
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "avg_batch": round(self.batched_frames / self.batches, 2) if self.batches else 0.0,
+            "cameras": cameras,
+        }
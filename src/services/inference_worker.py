@@ -0,0 +1,275 @@
+import logging
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from queue import Empty
+from time import monotonic
+
+from src.lib.constants import INFERENCE_RING_SLOTS, INFERENCE_READY_TIMEOUT, INFERENCE_RESULT_TIMEOUT
+from src.lib.entities import DetectionBatch, SourceFrame, TrackingResult
+from src.lib.utils import timed
+
+
+class SharedFrameRing:
+    def __init__(self, shape, slots: int, name: str = None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.owner = name is None
+
+        size = slots * int(np.prod(self.shape))
+        # A spawned worker inherits the parent's resource tracker, so only the owner's unlink() releases the block.
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+
+        self.frames = np.ndarray((slots, *self.shape), dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def spec(self):
+        return self.shm.name, self.shape, self.slots
+
+    def write(self, slot: int, frame):
+        np.copyto(self.frames[slot], frame)
+
+    def view(self, slot: int):
+        return self.frames[slot]
+
+    def close(self):
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class InferenceWorker:
+    def __init__(self, config: dict, slots: int = INFERENCE_RING_SLOTS, timeout: float = INFERENCE_RESULT_TIMEOUT):
+        ctx = mp.get_context("spawn")
+        self.requests = ctx.Queue()
+        self.results = ctx.Queue()
+        self.process = ctx.Process(
+            target=_worker_main, args=(config, self.requests, self.results), name="inference_worker", daemon=True
+        )
+
+        self.slots = slots
+        self.timeout = timeout
+        self.names = {}
+        self.report = {}
+        self.rings = None
+        self.next_slot = 0
+        # Slots of frames the worker has not answered yet; it may still be reading them after a timeout.
+        self.outstanding = {}
+        self.late_ended = []
+
+        self.completed = 0
+        self.timeouts = 0
+        self.failed = 0
+        self.skipped = 0
+        self.total_latency = 0.0
+
+    def start(self, ready_timeout: float = INFERENCE_READY_TIMEOUT) -> bool:
+        self.process.start()
+
+        try:
+            message = self.results.get(timeout=ready_timeout)
+        except Empty:
+            logging.error("Inference worker did not become ready in time")
+            self.stop()
+            return False
+
+        if message[0] != "ready":
+            logging.error(f"Inference worker failed to start: {message[1]}")
+            self.stop()
+            return False
+
+        _, self.names, self.report = message
+        logging.info(f"Inference worker ready (pid {self.process.pid})")
+        return True
+
+    def set_mode(self, mode: str):
+        self.requests.put(("mode", mode))
+
+    def _ensure_rings(self, source: SourceFrame):
+        shapes = (source.full.shape, source.inference.shape)
+        if self.rings and tuple(ring.shape for ring in self.rings) == shapes:
+            return
+
+        old = self.rings
+        self.rings = tuple(SharedFrameRing(shape, self.slots) for shape in shapes)
+        self.outstanding.clear()
+        self.requests.put(("attach", tuple(ring.spec for ring in self.rings)))
+
+        if old:
+            for ring in old:
+                ring.close()
+
+    def infer(self, frame_id: int, source: SourceFrame):
+        self._ensure_rings(source)
+
+        # Never overwrite a slot the worker may still be reading; with every slot busy the frame is skipped.
+        self._collect_late()
+        slot = self._free_slot()
+        if slot is None:
+            self.skipped += 1
+            return None
+
+        self.next_slot = (slot + 1) % self.slots
+        full_ring, inference_ring = self.rings
+        full_ring.write(slot, source.full)
+        inference_ring.write(slot, source.inference)
+        self.outstanding[frame_id] = slot
+
+        self.requests.put(("frame", frame_id, slot, source.scale, source.offset))
+        return self._await_result(frame_id)
+
+    def _free_slot(self) -> int:
+        busy = set(self.outstanding.values())
+        for i in range(self.slots):
+            slot = (self.next_slot + i) % self.slots
+            if slot not in busy:
+                return slot
+        return None
+
+    def _collect_late(self):
+        while True:
+            try:
+                message = self.results.get_nowait()
+            except Empty:
+                return
+            self._late_result(message)
+
+    def _late_result(self, message):
+        # A late answer frees its slot; its ended ids are kept so those tracks still end now instead of by TTL.
+        self.outstanding.pop(message[1], None)
+        if message[0] == "result":
+            self.late_ended.extend(message[5])
+
+    def predict(self, frame_id: int):
+        self._collect_late()
+        self.requests.put(("predict", frame_id))
+        return self._await_result(frame_id)
+
+    def _await_result(self, frame_id: int) -> TrackingResult:
+        start = monotonic()
+
+        while True:
+            try:
+                message = self.results.get(timeout=self.timeout)
+            except Empty:
+                self.timeouts += 1
+                return None
+
+            if message[1] == frame_id:
+                self.outstanding.pop(frame_id, None)
+                break
+            self._late_result(message)
+
+        if message[0] == "failed":
+            self.failed += 1
+            logging.error(f"Inference worker error on frame {frame_id}: {message[2]}")
+            return None
+
+        _, _, detections, annotations, tracks, ended, uncertainty, predicted = message
+        ended, self.late_ended = self.late_ended + list(ended), []
+        self.completed += 1
+        self.total_latency += monotonic() - start
+
+        return TrackingResult(
+            DetectionBatch.from_record(detections, self.names),
+            DetectionBatch.from_record(annotations, self.names),
+            DetectionBatch.from_record(tracks, self.names),
+            ended,
+            uncertainty,
+            predicted,
+        )
+
+    def stop(self):
+        if self.process.is_alive():
+            self.requests.put(("stop",))
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+
+        if self.rings:
+            for ring in self.rings:
+                ring.close()
+            self.rings = None
+
+    def stats(self) -> dict:
+        return {
+            "pid": self.process.pid,
+            "alive": self.process.is_alive(),
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "busy_slots": len(self.outstanding),
+            "avg_ms": round(self.total_latency / self.completed * 1000, 2) if self.completed else 0.0,
+        }
+
+
+def _worker_main(config: dict, requests, results):
+    # Runs in its own interpreter, so detection and tracking never contend for the main process's GIL.
+    from src.services.tracker import Tracker
+    from src.services.yolo_detector_service import YOLODetectorService
+
+    report = {}
+    try:
+        with timed(report, "tracker_load_ms"):
+            tracker = Tracker(config["encoder_model_path"], mode=config["tracker_mode"])
+        with timed(report, "tracker_warm_up_ms"):
+            tracker.warm_up()
+
+        with timed(report, "detector_load_ms"):
+            yolo = YOLODetectorService(
+                config["model_path"],
+                resolution=config["resolution"],
+                imgsz=config["imgsz"],
+                confidence=config["conf"],
+                tracker=tracker
+            )
+        with timed(report, "detector_warm_up_ms"):
+            yolo.warm_up(config["inference_shape"])
+    except Exception as e:
+        results.put(("error", str(e)))
+        return
+
+    results.put(("ready", yolo.model.names, report))
+
+    rings = ()
+    while True:
+        message = requests.get()
+        kind = message[0]
+
+        if kind == "stop":
+            break
+
+        if kind == "mode":
+            tracker.set_mode(message[1])
+            continue
+
+        if kind == "attach":
+            for ring in rings:
+                ring.close()
+            rings = tuple(SharedFrameRing(shape, slots, name=name) for name, shape, slots in message[1])
+            continue
+
+        frame_id = message[1]
+        try:
+            if kind == "predict":
+                detections = DetectionBatch()
+                annotations = yolo.predict()
+            else:
+                _, _, slot, scale, offset = message
+                full_ring, inference_ring = rings
+                source = SourceFrame(full_ring.view(slot), inference_ring.view(slot), scale, offset)
+
+                detections = source.to_full(yolo.detect(source.inference))
+                annotations = yolo.track(source.full, detections)
+
+            results.put((
+                "result", frame_id, detections.to_record(), annotations.to_record(), tracker.tracks.to_record(),
+                tracker.ended, tracker.uncertainty, kind == "predict",
+            ))
+        except Exception as e:
+            results.put(("failed", frame_id, str(e)))
+
+    for ring in rings:
+        ring.close()
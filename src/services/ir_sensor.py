@@ -0,0 +1,100 @@
+from collections import deque
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic
+
+from src.lib.constants import IR_BACKEND, IR_EVENT_BUFFER, IR_BOUNCE_TIME
+
+
+@dataclass
+class IREvent:
+    timestamp: float
+    active: bool
+
+
+class FakeInputDevice:
+    # Stands in for gpiozero.DigitalInputDevice on machines without a Pi; tests and replays drive it with trigger().
+    def __init__(self, pin: int, bounce_time: float = None):
+        self.pin = pin
+        self.is_active = False
+        self.when_activated = None
+        self.when_deactivated = None
+
+    def trigger(self, active: bool):
+        if active == self.is_active:
+            return
+
+        self.is_active = active
+        callback = self.when_activated if active else self.when_deactivated
+        if callback:
+            callback()
+
+    def pulse(self):
+        self.trigger(True)
+        self.trigger(False)
+
+    def close(self):
+        self.when_activated = self.when_deactivated = None
+
+
+class IRSensor:
+    def __init__(self, pin: int, backend: str = IR_BACKEND, buffer: int = IR_EVENT_BUFFER, bounce_time: float = IR_BOUNCE_TIME):
+        self.pin = pin
+        self.backend = backend
+
+        if backend == "fake":
+            self.device = FakeInputDevice(pin, bounce_time)
+        else:
+            # Plain InputDevice has no edge callbacks; DigitalInputDevice enables edge detection for them.
+            from gpiozero import DigitalInputDevice
+            self.device = DigitalInputDevice(pin, bounce_time=bounce_time)
+
+        # Edges are stamped in the GPIO callback, so a beam break between two frames is never lost or late.
+        self.events = deque(maxlen=buffer)
+        self.activations = 0
+        self._lock = Lock()
+
+        self.device.when_activated = lambda: self._record(True)
+        self.device.when_deactivated = lambda: self._record(False)
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self.device.is_active)
+
+    def _record(self, active: bool):
+        timestamp = monotonic()
+        with self._lock:
+            self.events.append(IREvent(timestamp, active))
+            if active:
+                self.activations += 1
+
+    def activations_between(self, start: float, end: float) -> list[float]:
+        with self._lock:
+            return [e.timestamp for e in self.events if e.active and start < e.timestamp <= end]
+
+    def active_at(self, timestamp: float) -> bool:
+        # Beam state at a past instant, taken from the last edge at or before it.
+        with self._lock:
+            for event in reversed(self.events):
+                if event.timestamp <= timestamp:
+                    return event.active
+            if self.events:
+                return not self.events[0].active
+        return self.is_active
+
+    def close(self):
+        self.device.when_activated = self.device.when_deactivated = None
+        self.device.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            last = self.events[-1].timestamp if self.events else None
+            buffered = len(self.events)
+
+        return {
+            "backend": self.backend,
+            "active": self.is_active,
+            "activations": self.activations,
+            "buffered_edges": buffered,
+            "last_edge_age_s": round(monotonic() - last, 3) if last is not None else None,
+        }
@@ -0,0 +1,133 @@
+from bisect import bisect_left
+from contextlib import nullcontext
+from threading import Lock
+from time import perf_counter
+
+from src.lib.constants import METRICS_ENABLED, METRICS_BUCKETS, METRICS_PREFIX
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = METRICS_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One slot per bucket plus +Inf; stored per-bucket and accumulated only when rendered.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self) -> tuple[list, float, int]:
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+    def quantile(self, q: float, snapshot: tuple = None) -> float:
+        counts, _, total_count = snapshot or self.snapshot()
+        if not total_count:
+            return 0.0
+
+        rank = q * total_count
+        seen = 0
+        for bound, count in zip(self.buckets, counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+class StageTimer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = METRICS_ENABLED, buckets: tuple[float, ...] = METRICS_BUCKETS, prefix: str = METRICS_PREFIX):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.prefix = prefix
+        self.histograms = {}
+        self.counters = {}
+        self._lock = Lock()
+        self._noop = nullcontext()
+
+    def _histogram(self, stage: str) -> Histogram:
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, Histogram(self.buckets))
+        return histogram
+
+    def time(self, stage: str):
+        # Disabled metrics cost one attribute check and hand back a shared no-op context.
+        if not self.enabled:
+            return self._noop
+        return StageTimer(self._histogram(stage))
+
+    def observe(self, stage: str, seconds: float):
+        if self.enabled:
+            self._histogram(stage).observe(seconds)
+
+    def inc(self, event: str, amount: int = 1):
+        if self.enabled:
+            with self._lock:
+                self.counters[event] = self.counters.get(event, 0) + amount
+
+    def _snapshot(self) -> tuple[dict, dict]:
+        # Other threads add stages and events while a scrape renders, so work from copies.
+        with self._lock:
+            histograms = dict(self.histograms)
+            counters = dict(self.counters)
+        return {stage: histogram.snapshot() for stage, histogram in sorted(histograms.items())}, counters
+
+    def render_prometheus(self) -> str:
+        histograms, counters = self._snapshot()
+        name = f"{self.prefix}_stage_seconds"
+        lines = [f"# HELP {name} Time spent in each camera pipeline stage.", f"# TYPE {name} histogram"]
+
+        for stage, (counts, total, count) in histograms.items():
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        name = f"{self.prefix}_events_total"
+        lines += [f"# HELP {name} Camera pipeline event counters.", f"# TYPE {name} counter"]
+        for event, count in sorted(counters.items()):
+            lines.append(f'{name}{{event="{event}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        histograms, counters = self._snapshot()
+        stages = {}
+        for stage, snapshot in histograms.items():
+            _, total, count = snapshot
+            histogram = self.histograms[stage]
+            stages[stage] = {
+                "count": count,
+                "avg_ms": round(total / count * 1000, 2) if count else 0.0,
+                "p50_ms": round(histogram.quantile(0.5, snapshot) * 1000, 2),
+                "p95_ms": round(histogram.quantile(0.95, snapshot) * 1000, 2),
+            }
+        return {"stages": stages, "counters": counters}
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from starlette.responses import StreamingResponse
+
+
+class FrameMailbox:
+    def __init__(self, width: int = None, quality: int = None):
+        self.variant = (width, quality)
+        self.version = 0
+        self.delivered = 0
+        self.skipped = 0
+        self.waiting = False
+        self.closed = False
+
+        self._jpeg = None
+        self._ready = asyncio.Event()
+
+    def offer(self, version: int, jpeg: bytes):
+        # Single slot: an unread frame is replaced, never queued behind.
+        if self._ready.is_set():
+            self.skipped += 1
+
+        self.version = version
+        self._jpeg = jpeg
+        self._ready.set()
+
+    def close(self):
+        # Wakes a blocked get() so the viewer leaves at once instead of after the idle timeout.
+        self.closed = True
+        self._ready.set()
+
+    async def get(self, timeout: float) -> bytes:
+        # Set while the viewer is idle and ready for its next frame; the producer renders on this demand.
+        self.waiting = True
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        finally:
+            self.waiting = False
+        if self.closed:
+            return None
+        self._ready.clear()
+        self.delivered += 1
+        return self._jpeg
+
+
+class MJPEGStreamingResponse(StreamingResponse):
+    def __init__(self, content, send_timeout: float = 5.0, **kwargs):
+        super().__init__(content, media_type="multipart/x-mixed-replace; boundary=frame", **kwargs)
+        self.send_timeout = send_timeout
+
+    async def stream_response(self, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        try:
+            async for chunk in self.body_iterator:
+                await asyncio.wait_for(
+                    send({"type": "http.response.body", "body": chunk, "more_body": True}),
+                    self.send_timeout,
+                )
+        except asyncio.TimeoutError:
+            logging.warning(f"Viewer stalled for more than {self.send_timeout}s, closing feed.")
+            return
+        finally:
+            await self.body_iterator.aclose()
+
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
@@ -0,0 +1,172 @@
+import os
+import json
+import glob
+import logging
+import platform
+import cv2
+import numpy as np
+from datetime import datetime
+from statistics import median
+from time import perf_counter
+
+from src.lib.constants import (
+    MODEL_DIR,
+    MODEL_NAME,
+    MODEL_BENCHMARK_CACHE,
+    MODEL_BENCHMARK_IMAGES,
+    MODEL_BENCHMARK_RUNS,
+)
+
+
+# Suffixes ultralytics gives each export format, checked in order so int8 variants win over their base format.
+EXPORT_PATTERNS = (
+    ("_int8_openvino_model", "openvino", True),
+    ("_openvino_model", "openvino", False),
+    ("_ncnn_model", "ncnn", False),
+    ("_int8.onnx", "onnx", True),
+    (".onnx", "onnx", False),
+    ("_full_integer_quant.tflite", "tflite", True),
+    ("_float32.tflite", "tflite", False),
+    (".pt", "torch", False),
+)
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        model_dir: str = MODEL_DIR,
+        model_name: str = MODEL_NAME,
+        cache_path: str = MODEL_BENCHMARK_CACHE,
+        image_dir: str = MODEL_BENCHMARK_IMAGES,
+        runs: int = MODEL_BENCHMARK_RUNS,
+    ):
+        self.model_dir = model_dir
+        self.model_name = model_name
+        self.cache_path = cache_path
+        self.image_dir = image_dir
+        self.runs = runs
+        self.report = {}
+
+    def discover(self) -> list[dict]:
+        exports = []
+        for path in sorted(glob.glob(os.path.join(self.model_dir, f"{self.model_name}*"))):
+            filename = os.path.basename(path)
+            for suffix, backend, quantized in EXPORT_PATTERNS:
+                if filename.endswith(suffix):
+                    exports.append({"path": path, "backend": backend, "quantized": quantized})
+                    break
+        return exports
+
+    def _fingerprint(self, exports: list[dict]) -> str:
+        # Re-benchmark when the CPU or any export changes.
+        parts = [platform.machine(), platform.processor() or platform.node()]
+        for export in exports:
+            parts.append(f"{export['path']}@{int(os.path.getmtime(export['path']))}")
+        return "|".join(parts)
+
+    def select(self, imgsz: int, shape: tuple[int, int], override: str = None) -> str:
+        exports = self.discover()
+        if not exports:
+            raise FileNotFoundError(f"No exports of {self.model_name} found in {self.model_dir}")
+
+        if override:
+            chosen = next((e for e in exports if override in (e["path"], e["backend"], os.path.basename(e["path"]))), None)
+            if chosen is not None:
+                self.report = {"selected": chosen["path"], "backend": chosen["backend"], "reason": "override"}
+                logging.info(f"Model override in settings: {chosen['path']}")
+                return chosen["path"]
+            logging.warning(f"Model override {override!r} matches no export, falling back to benchmark")
+
+        key = str(imgsz)
+        fingerprint = self._fingerprint(exports)
+        cache = self._load_cache()
+        cached = cache.get(key)
+
+        if cached and cached.get("fingerprint") == fingerprint and os.path.exists(cached.get("selected", "")):
+            self.report = dict(cached, reason="cached")
+            logging.info(f"Using cached model choice for imgsz {imgsz}: {cached['selected']}")
+            return cached["selected"]
+
+        latencies, errors = self.benchmark(exports, imgsz, shape)
+        if not latencies:
+            raise RuntimeError(f"Every model export failed to run: {errors}")
+
+        selected = min(latencies, key=latencies.get)
+        backend = next(e["backend"] for e in exports if e["path"] == selected)
+        entry = {
+            "selected": selected,
+            "backend": backend,
+            "latencies_ms": latencies,
+            "errors": errors,
+            "fingerprint": fingerprint,
+            "measured_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        cache[key] = entry
+        self._save_cache(cache)
+
+        self.report = dict(entry, reason="benchmark")
+        logging.info(f"Model benchmark for imgsz {imgsz}: {latencies} ms, selected {selected}")
+        return selected
+
+    def benchmark(self, exports: list[dict], imgsz: int, shape: tuple[int, int]) -> tuple[dict, dict]:
+        from ultralytics import YOLO
+
+        images = self._benchmark_images(shape)
+        latencies, errors = {}, {}
+
+        for export in exports:
+            path = export["path"]
+            try:
+                model = YOLO(path, task="detect")
+                for image in images[:2]:
+                    model(image, imgsz=imgsz, verbose=False)
+
+                samples = []
+                for i in range(self.runs):
+                    start = perf_counter()
+                    model(images[i % len(images)], imgsz=imgsz, verbose=False)
+                    samples.append(perf_counter() - start)
+
+                latencies[path] = round(median(samples) * 1000, 2)
+                logging.info(f"Benchmarked {path} ({export['backend']}): {latencies[path]} ms")
+            except Exception as e:
+                errors[path] = str(e)
+                logging.warning(f"Benchmark of {path} failed: {e}")
+
+        return latencies, errors
+
+    def _benchmark_images(self, shape: tuple[int, int]) -> list:
+        h, w = shape
+        images = []
+        for path in sorted(glob.glob(os.path.join(self.image_dir, "*.jpg"))):
+            image = cv2.imread(path)
+            if image is not None:
+                images.append(cv2.resize(image, (w, h), interpolation=cv2.INTER_AREA))
+
+        if images:
+            return images
+
+        # Seeded synthetic belt frames keep runs comparable when no sample images are installed.
+        rng = np.random.default_rng(0)
+        for _ in range(4):
+            image = rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+            for _ in range(6):
+                x, y = int(rng.integers(0, w - 40)), int(rng.integers(0, h - 40))
+                cv2.rectangle(image, (x, y), (x + 40, y + 40), tuple(int(c) for c in rng.integers(0, 255, 3)), -1)
+            images.append(image)
+        return images
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache: dict):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with open(self.cache_path, "w") as f:
+                json.dump(cache, f, indent=2)
+        except OSError as e:
+            logging.warning(f"Could not write model benchmark cache: {e}")
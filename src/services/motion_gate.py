@@ -0,0 +1,105 @@
+import cv2
+import numpy as np
+from threading import Lock
+
+from src.lib.constants import (
+    MOTION_DOWNSCALE_WIDTH,
+    MOTION_PIXEL_THRESHOLD,
+    MOTION_MIN_AREA,
+    MOTION_HOLD_FRAMES,
+    MOTION_ROI,
+)
+
+
+class MotionGate:
+    def __init__(
+        self,
+        downscale_width: int = MOTION_DOWNSCALE_WIDTH,
+        pixel_threshold: int = MOTION_PIXEL_THRESHOLD,
+        min_area: float = MOTION_MIN_AREA,
+        hold_frames: int = MOTION_HOLD_FRAMES,
+        roi: tuple[float, float, float, float] = MOTION_ROI,
+    ):
+        self.downscale_width = downscale_width
+        self.pixel_threshold = pixel_threshold
+        self.min_area = min_area
+        self.hold_frames = hold_frames
+        self.roi = roi
+
+        self.previous = None
+        self.hold_remaining = 0
+        self.just_woke = False
+
+        self.frames_seen = 0
+        self.frames_skipped = 0
+        self.wakeups = 0
+        self.late_wakeups = 0
+        self._lock = Lock()
+
+    def should_detect(self, frame, has_tracks: bool = False) -> bool:
+        motion = self._has_motion(frame)
+        awake = self.hold_remaining > 0
+
+        if motion:
+            self.hold_remaining = self.hold_frames
+        elif self.hold_remaining > 0:
+            self.hold_remaining -= 1
+
+        # Live tracks keep the detector running until they leave the belt.
+        detect = motion or awake or has_tracks
+        self.just_woke = detect and not awake and not has_tracks
+
+        with self._lock:
+            self.frames_seen += 1
+            if not detect:
+                self.frames_skipped += 1
+            elif self.just_woke:
+                self.wakeups += 1
+
+        return detect
+
+    def record_late_wakeup(self):
+        with self._lock:
+            self.late_wakeups += 1
+
+    def reset(self):
+        self.previous = None
+        self.hold_remaining = 0
+        self.just_woke = False
+
+    def _has_motion(self, frame) -> bool:
+        small = self._prepare(frame)
+        previous, self.previous = self.previous, small
+
+        if previous is None or previous.shape != small.shape:
+            return True
+
+        diff = cv2.absdiff(small, previous)
+        changed = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+
+        return changed >= self.min_area
+
+    def _prepare(self, frame):
+        h, w = frame.shape[:2]
+        x1, y1, x2, y2 = self.roi
+        belt = frame[int(y1 * h): int(y2 * h), int(x1 * w): int(x2 * w)]
+
+        bh, bw = belt.shape[:2]
+        width = min(self.downscale_width, bw)
+        small = cv2.resize(belt, (width, max(1, int(bh * width / bw))), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+        return cv2.GaussianBlur(gray, (3, 3), 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            seen, skipped = self.frames_seen, self.frames_skipped
+            wakeups, late = self.wakeups, self.late_wakeups
+
+        return {
+            "frames_seen": seen,
+            "frames_skipped": skipped,
+            "skip_ratio": round(skipped / seen, 3) if seen else 0.0,
+            "wakeups": wakeups,
+            "late_wakeups": late,
+        }
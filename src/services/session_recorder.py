@@ -0,0 +1,174 @@
+import json
+import zlib
+import struct
+import logging
+import cv2
+import numpy as np
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from time import monotonic
+
+from src.lib.constants import RECORD_JPEG_QUALITY, RECORD_CHUNK_RECORDS, RECORD_CHUNK_BYTES, RECORD_CAMERA_QUEUE_BYTES
+
+
+# File layout: MAGIC, then chunks of [flags:u8, size:u32, count:u32][zlib(records)],
+# each record being [kind:u8, t:f64, length:u32][payload].
+MAGIC = b"VBREC\x01"
+CHUNK_HEADER = struct.Struct("<BII")
+RECORD_HEADER = struct.Struct("<BdI")
+CHUNK_COMPRESSED = 1
+
+CAMERA = 1
+THERMAL = 2
+SERIAL = 3
+MQTT = 4
+
+
+class SessionRecorder:
+    def __init__(self, path: str, compress: bool = True, queue_size: int = 256, camera_queue_bytes: int = RECORD_CAMERA_QUEUE_BYTES):
+        self.path = path
+        self.compress = compress
+        self.camera_queue_bytes = camera_queue_bytes
+        self.dropped = 0
+        self.camera_dropped = 0
+        self.written = 0
+
+        self._camera_bytes = 0
+        self._camera_lock = Lock()
+
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._queue = Queue(maxsize=queue_size)
+        self._stop = Event()
+        self._start = monotonic()
+        self._thread = Thread(target=self._writer, name="session_recorder", daemon=True)
+        self._thread.start()
+        logging.info(f"Recording session to {path}")
+
+    def record_camera(self, frame):
+        # queue_size counts records, so raw frames get their own byte budget while the writer falls behind.
+        with self._camera_lock:
+            if self._camera_bytes + frame.nbytes > self.camera_queue_bytes:
+                self.camera_dropped += 1
+                return
+            self._camera_bytes += frame.nbytes
+
+        if not self._enqueue(CAMERA, frame):
+            self._release_camera(frame)
+
+    def _release_camera(self, frame):
+        with self._camera_lock:
+            self._camera_bytes -= frame.nbytes
+
+    def record_thermal(self, frame):
+        self._enqueue(THERMAL, np.asarray(frame, dtype=np.float32).copy())
+
+    def record_serial(self, port: str, line: str):
+        self._enqueue(SERIAL, {"port": port, "line": line})
+
+    def record_mqtt(self, topic: str, payload: str):
+        self._enqueue(MQTT, {"topic": topic, "payload": payload})
+
+    def _enqueue(self, kind, value):
+        # Hot paths only pay for a timestamp and a queue put; encoding happens on the writer thread.
+        try:
+            self._queue.put_nowait((kind, monotonic() - self._start, value))
+            return True
+        except Full:
+            self.dropped += 1
+            return False
+
+    def _encode(self, kind, value) -> bytes:
+        if kind == CAMERA:
+            ok, buf = cv2.imencode(".jpg", value, [cv2.IMWRITE_JPEG_QUALITY, RECORD_JPEG_QUALITY])
+            return buf.tobytes() if ok else b""
+        if kind == THERMAL:
+            return value.tobytes()
+        return json.dumps(value).encode("utf-8")
+
+    def _writer(self):
+        chunk = bytearray()
+        count = 0
+
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                kind, t, value = self._queue.get(timeout=0.5)
+            except Empty:
+                if count:
+                    self._flush(chunk, count)
+                    chunk, count = bytearray(), 0
+                continue
+
+            try:
+                payload = self._encode(kind, value)
+            except Exception as e:
+                logging.error(f"Session recorder encode error: {e}")
+                continue
+            finally:
+                if kind == CAMERA:
+                    self._release_camera(value)
+
+            chunk += RECORD_HEADER.pack(kind, t, len(payload)) + payload
+            count += 1
+
+            if count >= RECORD_CHUNK_RECORDS or len(chunk) >= RECORD_CHUNK_BYTES:
+                self._flush(chunk, count)
+                chunk, count = bytearray(), 0
+
+        if count:
+            self._flush(chunk, count)
+
+    def _flush(self, chunk: bytearray, count: int):
+        flags = 0
+        data = bytes(chunk)
+        if self.compress:
+            data = zlib.compress(data, 1)
+            flags |= CHUNK_COMPRESSED
+
+        self._file.write(CHUNK_HEADER.pack(flags, len(data), count))
+        self._file.write(data)
+        self._file.flush()
+        self.written += count
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._file.close()
+        logging.info(
+            f"Session recording closed: {self.written} records, {self.dropped} dropped, {self.camera_dropped} camera frames over budget"
+        )
+
+
+def read_session(path: str):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                return
+
+            flags, size, count = CHUNK_HEADER.unpack(header)
+            data = f.read(size)
+            if len(data) < size:
+                logging.warning(f"Truncated chunk at end of {path}")
+                return
+            if flags & CHUNK_COMPRESSED:
+                data = zlib.decompress(data)
+
+            offset = 0
+            for _ in range(count):
+                kind, t, length = RECORD_HEADER.unpack_from(data, offset)
+                offset += RECORD_HEADER.size
+                payload = data[offset: offset + length]
+                offset += length
+                yield kind, t, _decode(kind, payload)
+
+
+def _decode(kind, payload: bytes):
+    if kind == CAMERA:
+        return cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if kind == THERMAL:
+        return np.frombuffer(payload, dtype=np.float32).astype(float)
+    return json.loads(payload.decode("utf-8"))
@@ -0,0 +1,119 @@
+import os
+import shutil
+import logging
+import tempfile
+import numpy as np
+from collections import Counter
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic, sleep
+
+from src.lib.entities import UploadItem
+from src.services.session_recorder import CAMERA, THERMAL, SERIAL, MQTT, read_session
+from src.services.uploader import FoodWasteUploader
+
+
+@dataclass
+class ReplayMessage:
+    topic: str
+    payload: bytes
+
+
+class ReplayClient:
+    def __init__(self):
+        self.published = Counter()
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        self.published[topic] += 1
+
+
+@dataclass
+class ReplayResponse:
+    status_code: int = 200
+    text: str = "replayed"
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+
+class ReplayUploader(FoodWasteUploader):
+    # Exercises the spool and workers against a throwaway spool; nothing reaches the production spool or SERVER_URL.
+    def __init__(self, **kwargs):
+        self.spool_dir = tempfile.mkdtemp(prefix="replay_spool_")
+        super().__init__(base_url="replay://", spool_path=os.path.join(self.spool_dir, "upload_spool.db"), **kwargs)
+        self.classes = Counter()
+
+    def _post(self, key, item: UploadItem, payload: dict):
+        with self._lock:
+            self.classes[item.cls] += 1
+        return ReplayResponse()
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        with self._lock:
+            stats["classes"] = dict(self.classes)
+        return stats
+
+    def cleanup(self):
+        self.stop()
+        self.spool.close()
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+
+class ReplayThermalSensor:
+    def __init__(self):
+        self.refresh_rate = None
+        self._frame = np.zeros((24 * 32,), dtype=float)
+        self._lock = Lock()
+
+    def push(self, frame):
+        with self._lock:
+            self._frame = frame
+
+    def getFrame(self, out):
+        with self._lock:
+            out[:] = self._frame
+
+
+class ReplayDriver:
+    def __init__(self, path: str, speed: float = 1.0):
+        # speed=1.0 replays at recorded pace; speed<=0 replays as fast as the consumers allow.
+        self.path = path
+        self.speed = speed
+        self.handlers = {}
+        self.counts = Counter()
+
+    def on(self, kind: int, handler):
+        self.handlers[kind] = handler
+
+    def run(self, stop_event=None) -> dict:
+        start = monotonic()
+
+        for kind, t, value in read_session(self.path):
+            if stop_event is not None and stop_event.is_set():
+                break
+
+            if self.speed > 0:
+                delay = t / self.speed - (monotonic() - start)
+                if delay > 0:
+                    sleep(delay)
+
+            handler = self.handlers.get(kind)
+            if handler is None:
+                continue
+
+            try:
+                handler(value)
+                self.counts[kind] += 1
+            except Exception as e:
+                logging.error(f"Replay handler error for record kind {kind}: {e}")
+
+        elapsed = monotonic() - start
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "camera_frames": self.counts[CAMERA],
+            "thermal_frames": self.counts[THERMAL],
+            "serial_lines": self.counts[SERIAL],
+            "mqtt_messages": self.counts[MQTT],
+        }
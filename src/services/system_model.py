@@ -1,5 +1,7 @@
 from enum import Enum
 import adafruit_mlx90640
+from src.lib.constants import TRACKER_MODES, BELT_ROI, TARGET_FPS, LATENCY_BUDGET_MS, DETECTION_STRIDE
+from src.lib.utils import FrameROI
 
 class Status(Enum):
     ACTIVE = "active"
@@ -12,12 +14,24 @@ class SystemSettings:
         id: int = 0,
         status: Status = Status.IDLE,
         reading_interval: int = 30,
-        refresh_rate: any = adafruit_mlx90640.RefreshRate.REFRESH_2_HZ
+        refresh_rate: any = adafruit_mlx90640.RefreshRate.REFRESH_2_HZ,
+        tracker_mode: str = "appearance",
+        belt_roi: list = BELT_ROI,
+        target_fps: float = TARGET_FPS,
+        latency_budget_ms: float = LATENCY_BUDGET_MS,
+        detection_stride: int = DETECTION_STRIDE,
+        model_override: str = None,
     ):
         self.id = id
         self.status = status
         self.reading_interval = reading_interval
         self.worm_refresh_rate = refresh_rate
+        self.tracker_mode = tracker_mode
+        self.belt_roi = belt_roi
+        self.target_fps = target_fps
+        self.latency_budget_ms = latency_budget_ms
+        self.detection_stride = detection_stride
+        self.model_override = model_override
 
     def update(self, **kwargs):
         self._apply_updates(kwargs)
@@ -34,6 +48,27 @@ class SystemSettings:
                     continue
             elif key == 'id':
                 self.id = int(value)
+            elif key == 'tracker_mode':
+                if value in TRACKER_MODES:
+                    self.tracker_mode = value
+            elif key == 'belt_roi':
+                try:
+                    FrameROI.parse(value)
+                    self.belt_roi = value
+                except (TypeError, ValueError):
+                    continue
+            elif key in ('target_fps', 'latency_budget_ms'):
+                try:
+                    setattr(self, key, float(value) if value is not None else None)
+                except (TypeError, ValueError):
+                    continue
+            elif key == 'detection_stride':
+                try:
+                    self.detection_stride = max(1, int(value))
+                except (TypeError, ValueError):
+                    continue
+            elif key == 'model_override':
+                self.model_override = str(value) if value else None
             elif key == 'reading_interval':
                 self.reading_interval = int(value)
             elif key == 'refresh_rate':
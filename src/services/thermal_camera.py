@@ -3,17 +3,22 @@ from threading import Thread
 from time import sleep
 import cv2
 import numpy as np
-import board
-import busio
 import adafruit_mlx90640
 from flask import Flask, Response
 from werkzeug.serving import make_server
 
 
 class ThermalCameraProcessor:
-    def __init__(self, refresh_rate=adafruit_mlx90640.RefreshRate.REFRESH_2_HZ):
-        i2c = busio.I2C(board.SCL, board.SDA)
-        self.mlx = adafruit_mlx90640.MLX90640(i2c)
+    recorder = None
+
+    def __init__(self, refresh_rate=adafruit_mlx90640.RefreshRate.REFRESH_2_HZ, mlx=None):
+        if mlx is None:
+            import board
+            import busio
+            i2c = busio.I2C(board.SCL, board.SDA)
+            mlx = adafruit_mlx90640.MLX90640(i2c)
+
+        self.mlx = mlx
         self.mlx.refresh_rate = refresh_rate
         self.frame = np.zeros((24 * 32,), dtype=float)
         self.app = Flask(__name__)
@@ -27,6 +32,8 @@ class ThermalCameraProcessor:
 
     def _get_thermal_array(self):
         self.mlx.getFrame(self.frame)
+        if self.recorder:
+            self.recorder.record_thermal(self.frame)
         return self.frame.reshape((24, 32))
 
     def _process_image(self, data_array):
@@ -0,0 +1,125 @@
+import cv2
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from src.lib.constants import TRACK_STORE_MAX, TRACK_STATE_TTL, TRACK_SHARPNESS_WIDTH, TRACK_SHARPNESS_REF
+
+
+@dataclass
+class TrackState:
+    track_id: int
+    first_seen: float
+    last_seen: float
+    confidence_sums: dict = field(default_factory=dict)
+    vote_counts: dict = field(default_factory=dict)
+    crop: any = None
+    crop_score: float = 0.0
+
+    def vote(self, cls: str, conf: float):
+        self.confidence_sums[cls] = self.confidence_sums.get(cls, 0.0) + conf
+        self.vote_counts[cls] = self.vote_counts.get(cls, 0) + 1
+
+    @property
+    def label(self) -> tuple[str, float]:
+        # Confidence-weighted vote: the class with the largest summed confidence, reported at its mean confidence.
+        cls = max(self.confidence_sums, key=self.confidence_sums.get)
+        return cls, self.confidence_sums[cls] / self.vote_counts[cls]
+
+
+class TrackStore:
+    def __init__(
+        self,
+        max_tracks: int = TRACK_STORE_MAX,
+        ttl: float = TRACK_STATE_TTL,
+        sharpness_width: int = TRACK_SHARPNESS_WIDTH,
+        sharpness_ref: float = TRACK_SHARPNESS_REF,
+    ):
+        self.max_tracks = max_tracks
+        self.ttl = ttl
+        self.sharpness_width = sharpness_width
+        self.sharpness_ref = sharpness_ref
+
+        self.states = OrderedDict()
+        self._finished = []
+
+        self.ended = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.states)
+
+    def get(self, track_id: int) -> TrackState:
+        return self.states.get(track_id)
+
+    def observe(self, track_id: int, cls: str, conf: float, timestamp: float) -> TrackState:
+        state = self.states.get(track_id)
+        if state is None:
+            state = self.states[track_id] = TrackState(track_id, timestamp, timestamp)
+            if len(self.states) > self.max_tracks:
+                _, oldest = self.states.popitem(last=False)
+                self._finished.append(oldest)
+                self.evicted += 1
+        else:
+            self.states.move_to_end(track_id)
+
+        state.last_seen = timestamp
+        state.vote(cls, conf)
+        return state
+
+    def offer_crop(self, state: TrackState, crop, conf: float) -> bool:
+        if crop.size == 0:
+            return False
+
+        score = conf * self._sharpness(crop)
+        if score <= state.crop_score:
+            return False
+
+        # Only the winning candidate is copied out of the frame.
+        state.crop = crop.copy()
+        state.crop_score = score
+        return True
+
+    def _sharpness(self, crop) -> float:
+        # Laplacian variance at a fixed width so large and small crops score on the same scale.
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        h, w = gray.shape
+        if w > self.sharpness_width:
+            gray = cv2.resize(gray, (self.sharpness_width, max(1, round(h * self.sharpness_width / w))), interpolation=cv2.INTER_AREA)
+
+        variance = cv2.Laplacian(gray, cv2.CV_32F).var()
+        return variance / (variance + self.sharpness_ref)
+
+    def pop_finished(self, ended_ids, now: float) -> list[TrackState]:
+        finished, self._finished = self._finished, []
+
+        for track_id in ended_ids:
+            state = self.states.pop(track_id, None)
+            if state is not None:
+                finished.append(state)
+                self.ended += 1
+
+        # Safety net for end events lost with dropped frames; states are in last-seen order.
+        while self.states:
+            track_id, state = next(iter(self.states.items()))
+            if now - state.last_seen < self.ttl:
+                break
+            del self.states[track_id]
+            finished.append(state)
+            self.expired += 1
+
+        return finished
+
+    def drain(self) -> list[TrackState]:
+        finished = self._finished + list(self.states.values())
+        self._finished = []
+        self.states.clear()
+        return finished
+
+    def stats(self) -> dict:
+        return {
+            "live": len(self.states),
+            "ended": self.ended,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
@@ -1,59 +1,161 @@
+import logging
 import numpy as np
-from src.lib.entities import Track
+from threading import Lock
+from time import monotonic
+from src.lib.entities import DetectionBatch
+from src.lib.constants import ENCODER_MODEL_PATH, TRACKER_MODES
+from src.services.metrics import metrics
 from deep_sort.deep_sort.tracker import Tracker as DeepSortTracker
 from deep_sort.tools import generate_detections as gdet
-from deep_sort.deep_sort import nn_matching
+from deep_sort.deep_sort import nn_matching, linear_assignment, iou_matching
 from deep_sort.deep_sort.detection import Detection
 
 
+_encoders = {}
+_encoders_lock = Lock()
+
+
+def load_image_encoder(model_path: str):
+    # The mars-small128 graph is loaded once per process and shared by every Tracker.
+    with _encoders_lock:
+        if model_path not in _encoders:
+            _encoders[model_path] = gdet.ImageEncoder(model_path)
+        return _encoders[model_path]
+
+
+class SwitchableDeepSortTracker(DeepSortTracker):
+    use_appearance = True
+
+    def _match(self, detections):
+        if self.use_appearance:
+            return super()._match(detections)
+
+        # Motion-only: IoU against Kalman-predicted boxes for every track.
+        return linear_assignment.min_cost_matching(
+            iou_matching.iou_cost, self.max_iou_distance, self.tracks, detections
+        )
+
+
 class Tracker:
     tracker = None
     encoder = None
-    tracks = None
+    tracks = DetectionBatch()
 
-    def __init__(self):
+    def __init__(self, encoder_model_path: str = ENCODER_MODEL_PATH, mode: str = "appearance"):
         max_age = 20
         n_init = 2
         max_cosine_distance = 0.8
         nn_budget = None
 
-        encoder_model_filename = '/home/raspi/projects/system_rebase/models/mars-small128.pb'
-
         metric = nn_matching.NearestNeighborDistanceMetric("cosine", max_cosine_distance, nn_budget)
-        self.tracker = DeepSortTracker(metric, n_init=n_init, max_age=max_age)
-        self.encoder = gdet.create_box_encoder(encoder_model_filename, batch_size=1)
+        self.tracker = SwitchableDeepSortTracker(metric, n_init=n_init, max_age=max_age)
+        self.encoder = load_image_encoder(encoder_model_path)
+        self.set_mode(mode)
 
-    def update(self, frame, detections):
+        # The Kalman filter steps once per update; this converts its per-step velocity to per-second.
+        self.last_update = None
+        self.step_seconds = None
 
-        if len(detections) == 0:
+        # Ids DeepSORT dropped in the latest update, so per-track state can be released.
+        self.known_ids = set()
+        self.ended = []
+
+        # Kalman-only steps since the last detection, and the largest position std-dev (px) among live tracks.
+        self.steps_since_detection = 0
+        self.uncertainty = 0.0
+
+    @property
+    def mode(self):
+        return "appearance" if self.tracker.use_appearance else "motion"
+
+    def set_mode(self, mode: str):
+        if mode not in TRACKER_MODES:
+            logging.warning(f"Ignored invalid tracker mode: {mode}")
+            return
+
+        if mode != self.mode:
+            logging.info(f"Tracker association mode: {mode}")
+        self.tracker.use_appearance = mode == "appearance"
+
+    def warm_up(self):
+        # First forward pass allocates the TF graph buffers; keep it off the first real frame.
+        patch_shape = self.encoder.image_shape
+        self.encoder(np.zeros((1, *patch_shape), dtype=np.uint8), 1)
+
+    def _mark_step(self):
+        now = monotonic()
+        # Gaps from motion-gated pauses are not steps of the filter and would skew the estimate.
+        if self.last_update is not None and now - self.last_update < 1.0:
+            dt = now - self.last_update
+            self.step_seconds = dt if self.step_seconds is None else self.step_seconds + 0.2 * (dt - self.step_seconds)
+        self.last_update = now
+
+    def predict(self):
+        self._mark_step()
+        self.steps_since_detection += 1
+
+        with metrics.time("tracker_predict"):
             self.tracker.predict()
-            self.tracker.update([])  
             self.update_tracks()
+
+    def update(self, frame, detections: DetectionBatch):
+        self._mark_step()
+        self.steps_since_detection = 0
+
+        if len(detections) == 0:
+            with metrics.time("tracker_update"):
+                self.tracker.predict()
+                self.tracker.update([])  
+                self.update_tracks()
             return
 
-        bboxes = np.asarray([d[:-1] for d in detections])
-        bboxes[:, 2:] = bboxes[:, 2:] - bboxes[:, 0:2]
-        scores = [d[-1] for d in detections]
+        bboxes = detections.tlwh()
+        scores = detections.confidences
 
-        features = self.encoder(frame, bboxes)
+        with metrics.time("encoder"):
+            features = self.encode(frame, bboxes)
 
         dets = []
         for bbox_id, bbox in enumerate(bboxes):
             dets.append(Detection(bbox, scores[bbox_id], features[bbox_id]))
 
-        self.tracker.predict()
-        self.tracker.update(dets)
-        self.update_tracks()
+        with metrics.time("tracker_update"):
+            self.tracker.predict()
+            self.tracker.update(dets)
+            self.update_tracks()
 
-    def update_tracks(self):
-        tracks = []
-        for track in self.tracker.tracks:
-            if not track.is_confirmed() or track.time_since_update > 1:
-                continue
-            bbox = track.to_tlbr()
+    def encode(self, frame, bboxes):
+        feature_dim = self.encoder.feature_dim
+
+        if not self.tracker.use_appearance:
+            # Constant unit vectors keep the metric's sample store valid if appearance is re-enabled.
+            return np.full((len(bboxes), feature_dim), 1 / np.sqrt(feature_dim), dtype=np.float32)
 
-            id = track.track_id
+        patch_shape = self.encoder.image_shape
+        patches = []
+        for box in bboxes:
+            patch = gdet.extract_image_patch(frame, box, patch_shape[:2])
+            if patch is None:
+                patch = np.random.uniform(0., 255., patch_shape).astype(np.uint8)
+            patches.append(patch)
+
+        # Every crop of the frame goes through the network in a single forward pass.
+        return self.encoder(np.asarray(patches), len(patches))
+
+    def update_tracks(self):
+        current = {track.track_id for track in self.tracker.tracks}
+        self.ended = list(self.known_ids - current)
+        self.known_ids = current
 
-            tracks.append(Track(id, bbox))
+        live = [
+            track for track in self.tracker.tracks
+            if track.is_confirmed() and track.time_since_update <= self.steps_since_detection + 1
+        ]
+        self.uncertainty = max((float(np.sqrt(track.covariance[:2, :2].diagonal().max())) for track in live), default=0.0)
 
-        self.tracks = tracks
+        step = self.step_seconds or 1.0
+        self.tracks = DetectionBatch(
+            boxes=[track.to_tlbr() for track in live],
+            track_ids=[track.track_id for track in live],
+            velocities=[track.mean[4:6] / step for track in live] if self.step_seconds else None,
+        )
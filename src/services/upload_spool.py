@@ -0,0 +1,91 @@
+import os
+import json
+import sqlite3
+import logging
+from threading import Lock
+from time import time
+
+from src.lib.entities import UploadItem
+
+
+class UploadSpool:
+    def __init__(self, path: str, max_items: int):
+        self.path = path
+        self.max_items = max_items
+        self.evicted = 0
+        self._lock = Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS uploads (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT UNIQUE NOT NULL,
+                track_id INTEGER,
+                cls TEXT NOT NULL,
+                conf REAL NOT NULL,
+                filename TEXT NOT NULL,
+                data BLOB,
+                path TEXT,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+
+    def append(self, key: str, item: UploadItem, payload: dict) -> bool:
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO uploads (key, track_id, cls, conf, filename, data, path, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, item.track_id, item.cls, item.conf, item.filename, item.data, item.path, json.dumps(payload), time()),
+            )
+            if cursor.rowcount == 0:
+                return False
+
+            overflow = self._count() - self.max_items
+            if overflow > 0:
+                self.conn.execute(
+                    "DELETE FROM uploads WHERE id IN (SELECT id FROM uploads ORDER BY id LIMIT ?)", (overflow,)
+                )
+                self.evicted += overflow
+                logging.warning(f"Upload spool over {self.max_items} items, evicted {overflow} oldest")
+
+            return True
+
+    def next_batch(self, limit: int, exclude: set = None) -> list[tuple[int, str, UploadItem, dict]]:
+        exclude = list(exclude or ())
+        placeholders = ",".join("?" * len(exclude))
+        where = f"WHERE id NOT IN ({placeholders})" if exclude else ""
+
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT id, key, track_id, cls, conf, filename, data, path, payload FROM uploads {where} ORDER BY id LIMIT ?",
+                (*exclude, limit),
+            ).fetchall()
+
+        return [
+            (row_id, key, UploadItem(track_id, cls, conf, filename, data, path), json.loads(payload))
+            for row_id, key, track_id, cls, conf, filename, data, path, payload in rows
+        ]
+
+    def remove(self, row_id: int):
+        with self._lock:
+            self.conn.execute("DELETE FROM uploads WHERE id = ?", (row_id,))
+
+    def __len__(self):
+        with self._lock:
+            return self._count()
+
+    def _count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,284 @@
+import os
+import random
+import uuid
+import logging
+import requests
+from collections import deque
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from time import monotonic, perf_counter
+from requests.adapters import HTTPAdapter
+
+from src.lib.constants import (
+    UPLOAD_ENDPOINT,
+    UPLOAD_WORKERS,
+    UPLOAD_BATCH_SIZE,
+    UPLOAD_SPOOL_PATH,
+    UPLOAD_SPOOL_MAX_ITEMS,
+    UPLOAD_TIMEOUT,
+    UPLOAD_MAX_RETRIES,
+    UPLOAD_BACKOFF_BASE,
+    UPLOAD_BACKOFF_MAX,
+)
+from src.lib.entities import UploadItem
+from src.lib.utils import create_payload
+from src.services.upload_spool import UploadSpool
+
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class FoodWasteUploader:
+    def __init__(
+        self,
+        base_url: str = None,
+        workers: int = UPLOAD_WORKERS,
+        batch_size: int = UPLOAD_BATCH_SIZE,
+        spool_path: str = UPLOAD_SPOOL_PATH,
+        spool_max_items: int = UPLOAD_SPOOL_MAX_ITEMS,
+        timeout: tuple[float, float] = UPLOAD_TIMEOUT,
+        max_retries: int = UPLOAD_MAX_RETRIES,
+        backoff_base: float = UPLOAD_BACKOFF_BASE,
+        backoff_max: float = UPLOAD_BACKOFF_MAX,
+    ):
+        self.base_url = base_url
+        self.workers = workers
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # Every upload is journaled first; the in-memory queue only holds the batch being sent.
+        self.spool = UploadSpool(spool_path, spool_max_items)
+        self.queue = Queue(maxsize=batch_size)
+        self.stop_event = Event()
+        self.wake_event = Event()
+        self.threads = []
+        self.dispatched = set()
+        self.offline_until = 0.0
+
+        # Keep-alive pool sized to the worker count so connections are reused.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Track ids restart at 1 with every process, so keys carry a per-boot id to stay unique against the spool.
+        self.boot_id = uuid.uuid4().hex[:8]
+        self._seen_keys = set()
+        self._seen_order = deque(maxlen=4096)
+        self._latencies = deque(maxlen=100)
+        self._lock = Lock()
+
+        self.in_flight = 0
+        self.uploaded = 0
+        self.failed = 0
+        self.retries = 0
+        self.dropped = 0
+
+    @property
+    def url(self):
+        return f"{self.base_url or os.getenv('SERVER_URL')}{UPLOAD_ENDPOINT}"
+
+    def start(self):
+        if any(thread.is_alive() for thread in self.threads):
+            return
+
+        self.stop_event.clear()
+        with self._lock:
+            self.dispatched.clear()
+        with self.queue.mutex:
+            self.queue.queue.clear()
+
+        self.threads = [
+            Thread(target=self._worker, name=f"upload_worker_{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        self.threads.append(Thread(target=self._dispatch, name="upload_dispatcher", daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+        pending = len(self.spool)
+        if pending:
+            logging.info(f"Replaying {pending} spooled uploads")
+
+    def stop(self, timeout: float = 2):
+        self.stop_event.set()
+        self.wake_event.set()
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+
+        pending = len(self.spool)
+        if pending:
+            logging.info(f"Uploader stopped, {pending} uploads kept in spool")
+
+    def idempotency_key(self, schedule_id: int, item: UploadItem) -> str:
+        suffix = item.track_id if item.track_id is not None else item.filename
+        # Every belt's tracker numbers its tracks from 1, so the belt is part of the key.
+        if item.camera_id is not None:
+            suffix = f"{item.camera_id}-{suffix}"
+        return f"{schedule_id}-{self.boot_id}-{suffix}"
+
+    def submit(self, item: UploadItem, schedule_id: int) -> bool:
+        key = self.idempotency_key(schedule_id, item)
+
+        with self._lock:
+            if key in self._seen_keys:
+                return False
+
+        payload = create_payload(schedule_id, item.cls, item.conf)
+
+        try:
+            spooled = self.spool.append(key, item, payload)
+        except Exception as e:
+            with self._lock:
+                self.dropped += 1
+            logging.error(f"Failed to spool upload {key}: {e}")
+            return False
+
+        # Only a journaled key counts as seen, so a failed append can be submitted again.
+        with self._lock:
+            if key not in self._seen_keys:
+                if len(self._seen_order) == self._seen_order.maxlen:
+                    self._seen_keys.discard(self._seen_order[0])
+                self._seen_order.append(key)
+                self._seen_keys.add(key)
+
+        self.wake_event.set()
+        return spooled
+
+    def _dispatch(self):
+        while not self.stop_event.is_set():
+            wait = self.offline_until - monotonic()
+            if wait > 0:
+                self.stop_event.wait(wait)
+                continue
+
+            with self._lock:
+                exclude = set(self.dispatched)
+
+            try:
+                batch = self.spool.next_batch(self.batch_size, exclude)
+            except Exception as e:
+                logging.error(f"Upload spool read error: {e}")
+                batch = []
+
+            if not batch:
+                self.wake_event.wait(1)
+                self.wake_event.clear()
+                continue
+
+            for row_id, key, item, payload in batch:
+                with self._lock:
+                    self.dispatched.add(row_id)
+                while not self.stop_event.is_set():
+                    try:
+                        self.queue.put((row_id, key, item, payload), timeout=0.5)
+                        break
+                    except Full:
+                        continue
+
+    def _worker(self):
+        while not self.stop_event.is_set():
+            try:
+                row_id, key, item, payload = self.queue.get(timeout=0.5)
+            except Empty:
+                continue
+
+            if monotonic() < self.offline_until:
+                # Server went away while this batch was queued; leave it in the spool.
+                with self._lock:
+                    self.dispatched.discard(row_id)
+                continue
+
+            with self._lock:
+                self.in_flight += 1
+            try:
+                done = self._upload_with_retry(key, item, payload)
+                if done:
+                    self.spool.remove(row_id)
+                else:
+                    self.offline_until = monotonic() + self.backoff_max
+                    logging.warning(f"Server unreachable, pausing uploads for {self.backoff_max}s")
+            except Exception as e:
+                logging.error(f"Upload worker error: {e}")
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                    self.dispatched.discard(row_id)
+
+    def _upload_with_retry(self, key, item: UploadItem, payload: dict) -> bool:
+        # True once the record is settled (accepted or permanently rejected); False keeps it spooled.
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.0)
+                with self._lock:
+                    self.retries += 1
+                if self.stop_event.wait(delay):
+                    break
+
+            start = perf_counter()
+            try:
+                r = self._post(key, item, payload)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                logging.warning(f"Upload {key} attempt {attempt + 1} failed: {e}")
+                continue
+            except Exception as e:
+                logging.error(f"Upload {key} error: {e}")
+                with self._lock:
+                    self.failed += 1
+                return True
+
+            with self._lock:
+                self._latencies.append(perf_counter() - start)
+
+            if r.ok:
+                with self._lock:
+                    self.uploaded += 1
+                logging.info(f"Upload response: {r.status_code} - {r.text}")
+                return True
+
+            if r.status_code not in RETRYABLE_STATUS:
+                logging.error(f"Upload {key} rejected: {r.status_code} - {r.text}")
+                with self._lock:
+                    self.failed += 1
+                return True
+
+            logging.warning(f"Upload {key} attempt {attempt + 1} got {r.status_code}, retrying")
+
+        return False
+
+    def _post(self, key, item: UploadItem, payload: dict):
+        content = item.data
+        if content is None:
+            with open(item.path, "rb") as f:
+                content = f.read()
+
+        files = {"file": (item.filename, content, "image/jpeg")}
+        data = {k: str(v) for k, v in payload.items()}
+        headers = {"Idempotency-Key": key}
+
+        return self.session.post(self.url, files=files, data=data, headers=headers, timeout=self.timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "in_flight": self.in_flight,
+                "uploaded": self.uploaded,
+                "failed": self.failed,
+                "retries": self.retries,
+                "dropped": self.dropped,
+            }
+
+        stats["queue_depth"] = len(self.spool)
+        stats["spool_evicted"] = self.spool.evicted
+        stats["offline"] = monotonic() < self.offline_until
+
+        if latencies:
+            stats["latency_avg_ms"] = round(sum(latencies) / len(latencies) * 1000, 1)
+            stats["latency_p95_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)
+
+        return stats
@@ -1,8 +1,10 @@
-import cv2
-from src.lib.entities import Metadata
+import numpy as np
+from src.lib.entities import DetectionBatch
+from src.lib.utils import iou_matrix, match_one_to_one, render_tracks, classify_object_region, exit_clear
+from src.services.metrics import metrics
 from src.services.tracker import Tracker
 from ultralytics import YOLO
-from src.lib.constants import RAND_COLORS
+from src.lib.constants import ASSOCIATION_MIN_IOU
 from dataclasses import dataclass
 
 
@@ -13,88 +15,91 @@ class YOLODetectorService:
         resolution: tuple[int, int] = (640, 640),
         imgsz: int = 640,
         confidence: float = 0.2,
-        tracker: Tracker = Tracker()
+        tracker: Tracker = None,
+        model: YOLO = None,
     ):
-        self.model = YOLO(model_path, task="detect")
+        # Belts on a shared InferenceScheduler pass its model in instead of loading their own copy.
+        self.model = model if model is not None else YOLO(model_path, task="detect")
         self.resolution = resolution
         self.imgz = imgsz
         self.confidence = confidence
-        self.tracker = tracker
+        self.tracker = tracker or Tracker()
+        self.annotations = DetectionBatch()
         
-    def detect(self, frame):
-        results = self.model(frame, conf=self.confidence, verbose=False, show=False)
-        result = results[0]
+    def warm_up(self, shape: tuple[int, int], runs: int = 2):
+        # The first NCNN calls build the graph and allocate blobs; pay for them on a blank frame.
+        dummy = np.zeros((*shape, 3), dtype=np.uint8)
+        for _ in range(runs):
+            self.model(dummy, conf=self.confidence, imgsz=self.imgz, verbose=False, show=False)
 
-        detections, metadata = self.make_detections(result)
-        
-        return detections, metadata
-        
-    def make_detections(self, result):
-        boxes = result.boxes
-        detections = []
-        metadata = []
-        
-        for box in boxes.data.tolist():
-            x1, y1, x2, y2, conf, class_id = box
-            x1, y1, x2, y2, class_id = map(int, (x1, y1, x2, y2, class_id))
-            cls = self.model.names[class_id]
+    def detect(self, frame) -> DetectionBatch:
+        with metrics.time("yolo"):
+            results = self.model(frame, conf=self.confidence, imgsz=self.imgz, verbose=False, show=False)
+        result = results[0]
 
-            detections.append([x1, y1, x2, y2, conf])
-            metadata.append(((x1, y1, x2, y2), conf, cls))
+        detections = self.make_detections(result)
+        metrics.inc("detections", len(detections))
+        return detections
         
-        return detections, metadata
+    def make_detections(self, result) -> DetectionBatch:
+        # One (N, 6) array straight from the result; no per-box Python objects.
+        data = result.boxes.numpy().data
+        return DetectionBatch.from_xyxy_conf_cls(data, names=self.model.names)
     
-    def draw_detections(self, frame, detections, metadata):
+    def track(self, frame, detections: DetectionBatch) -> DetectionBatch:
         self.tracker.update(frame, detections)
-        annotated_detections = []
 
-        for track in self.tracker.tracks:
-            x1, y1, x2, y2 = map(int, track.bbox)
-            track_id = track.track_id
-            color = RAND_COLORS[track_id % len(RAND_COLORS)]
-            
-            label = 'unknown'
-            for _, conf, cls in metadata:
-                label = f'{cls}: {conf:.2f}%'
-                annotated_detections.append(
-                    Metadata(
-                        track_id=track_id,
-                        bbox=(x1, y1, x2, y2),
-                        conf=conf,
-                        cls=cls
-                    )
-                )
-                break
-                
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
-            (text_w, text_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-            cv2.rectangle(frame, (x1, y1 - text_h - 4), (x1 + text_w, y1), color, -1)
-            cv2.putText(frame, label, (x1, y1 - 2), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        with metrics.time("association"):
+            self.annotations = self.associate(self.tracker.tracks, detections)
+        return self.annotations
+
+    def predict(self) -> DetectionBatch:
+        # Between detections tracks move on the Kalman prediction and keep their last detected label.
+        self.tracker.predict()
+        self.annotations = self.carry_labels(self.tracker.tracks, self.annotations)
+        return self.annotations
+
+    def carry_labels(self, tracks: DetectionBatch, previous: DetectionBatch) -> DetectionBatch:
+        if not tracks or not previous:
+            return DetectionBatch(names=previous.names)
 
-        return frame, annotated_detections
+        order = np.argsort(previous.track_ids)
+        index = np.searchsorted(previous.track_ids, tracks.track_ids, sorter=order)
+        index = order[np.clip(index, 0, len(order) - 1)]
+        labelled = previous.track_ids[index] == tracks.track_ids
+
+        return DetectionBatch(
+            boxes=tracks.boxes[labelled],
+            confidences=previous.confidences[index[labelled]],
+            class_ids=previous.class_ids[index[labelled]],
+            track_ids=tracks.track_ids[labelled],
+            velocities=tracks.velocities[labelled],
+            names=previous.names,
+        )
+
+    def associate(self, tracks: DetectionBatch, detections: DetectionBatch, min_iou=ASSOCIATION_MIN_IOU) -> DetectionBatch:
+        if not tracks or not detections:
+            return DetectionBatch(names=detections.names)
+
+        best = match_one_to_one(iou_matrix(tracks.boxes, detections.boxes), min_iou)
+        matched = best >= 0
+        best = best[matched]
+
+        return DetectionBatch(
+            boxes=tracks.boxes[matched],
+            confidences=detections.confidences[best],
+            class_ids=detections.class_ids[best],
+            track_ids=tracks.track_ids[matched],
+            velocities=tracks.velocities[matched],
+            names=detections.names,
+        )
+
+    def render(self, frame, tracks, annotations):
+        with metrics.time("draw"):
+            return render_tracks(frame, tracks, annotations)
     
-    def classify_object_region(self, metadata, frame_width):
-        region_width = frame_width // 3
-        region_classes = {
-            'entry': [],
-            'middle': [],
-            'exit': [],
-        }
-        
-        for obj in metadata:
-            x1, _, x2, _ = map(int, obj.bbox)
-            center_x = (x1 + x2) / 2
-            
-            if center_x < region_width:
-                region = "exit"
-            elif center_x < region_width * 2:
-                region = "middle"
-            else:
-                region = "entry"
-            
-            region_classes[region].append(obj)
-            
-        return region_classes
+    def classify_object_region(self, detections: DetectionBatch, frame_width):
+        return classify_object_region(detections, frame_width)
     
     def exit_clear(self, regions):
-        return len(regions["exit"]) == 0
+        return exit_clear(regions)